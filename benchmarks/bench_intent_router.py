@@ -0,0 +1,62 @@
+"""
+Micro-benchmark do roteamento de intenções no caminho sem LLM.
+
+Compara a varredura antiga (DOMAIN_INTENTS com re.search a cada mensagem,
+regex extras para inventário/códigos e o _REGEX do extrator) com o matcher
+único de `intent_router.route`. Ganho medido: ~1.4x (17.4 µs -> 12.8 µs
+por mensagem).
+
+    python -m benchmarks.bench_intent_router [--rounds 2000]
+"""
+import re
+import time
+import logging
+import argparse
+
+from src.services.intent_router import DOMAIN_INTENTS, route
+from src.utils.product_extractor import _REGEX, _sanitize, _strip_accents
+
+MESSAGES = [
+    "Quantos parafusos eu tenho no meu estoque?",
+    "mostrar códigos do parafuso",
+    "Como acessar o inventário?",
+    "Onde vejo o mapa de rastreamento?",
+    "Como gerar lote de QR Codes?",
+    "qual a previsão do tempo amanhã?",
+    "me conta uma piada",
+    "Onde configuro meus dados?",
+]
+
+def legacy(user_message: str):
+    lower = _strip_accents(user_message)
+    if not any(re.search(p, lower) for p in DOMAIN_INTENTS):
+        return "fallback", ""
+    wants_inventory = re.search(r"\b(quantos?|qtd|tem|tenho)\b", lower)
+    wants_codes = re.search(r"\b(?:codig\w*|mostrar codig\w*|listar codig\w*|quais codig\w*)\b", lower)
+    produto = ""
+    if wants_inventory or wants_codes:
+        if m := _REGEX.search(user_message):
+            produto = _sanitize(m.group("prod"))
+    return "domain", produto
+
+def bench(fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for msg in MESSAGES:
+            fn(msg)
+    return (time.perf_counter() - start) / (rounds * len(MESSAGES)) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+    logging.getLogger("product_extractor").setLevel(logging.WARNING)
+
+    old = bench(legacy, args.rounds)
+    new = bench(route, args.rounds)
+    print(f"legado : {old:7.2f} µs/mensagem")
+    print(f"router : {new:7.2f} µs/mensagem")
+    print(f"ganho  : {old / new:7.2f}x")
+
+if __name__ == "__main__":
+    main()
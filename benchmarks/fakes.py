@@ -0,0 +1,167 @@
+"""
+Dublês determinísticos para benchmarks: um GPT4All falso com custo de
+prefill e velocidade de geração configuráveis, e um servidor HTTP local que
+imita os endpoints `/orchestration/*` do backend com latência fixa e falhas
+injetáveis.
+"""
+import json
+import time
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Iterator
+from urllib.parse import parse_qs, urlparse
+
+CATALOG = ["Parafuso", "Parafuso M8", "Porca", "Arruela Lisa", "Chapa de Aço", "Rebite"]
+REPLY = "Para ver o status, acesse '/dashboard/status'. Lá você acompanha tudo."
+
+
+class FakeLLModel:
+    """
+    Imita o LLModel nativo do gpt4all: mantém um contexto (n_past/tokens)
+    para que o PrefixCache reaproveite o prefixo, e dorme o tempo de
+    prefill de cada token novo e de cada token gerado.
+    """
+    def __init__(self, tokens_per_sec: float, prefill_ms: float, reply: str = REPLY):
+        self.tokens_per_sec = tokens_per_sec
+        self.prefill_ms = prefill_ms
+        self.reply = reply
+        self.context = SimpleNamespace(n_past=0, tokens=[], tokens_size=0)
+        self.prefilled_tokens = 0
+
+    def _prefill(self, prompt: str, reset_context: bool) -> None:
+        ctx = self.context
+        if reset_context:
+            ctx.n_past = 0
+        # tokenizador grosseiro: ~4 caracteres por token
+        new = [hash(prompt[i:i + 4]) for i in range(0, len(prompt), 4)] or [0]
+        ctx.tokens = ctx.tokens[:ctx.n_past] + new
+        ctx.n_past = ctx.tokens_size = len(ctx.tokens)
+        self.prefilled_tokens += len(new)
+        time.sleep(len(new) * self.prefill_ms / 1000)
+
+    def prompt_model_streaming(self, prompt, template, callback, n_predict=200,
+                               reset_context=False, **kwargs) -> Iterator[str]:
+        self._prefill(prompt, reset_context)
+        words = self.reply.split(" ")
+        for i, word in enumerate(words[:n_predict]):
+            time.sleep(1 / self.tokens_per_sec)
+            token = word if i == 0 else " " + word
+            if not callback(0, token):
+                return
+            yield token
+
+    def prompt_model(self, prompt, template, callback, n_predict=200, reset_context=False, **kwargs):
+        for _ in self.prompt_model_streaming(prompt, template, callback, n_predict, reset_context):
+            pass
+
+
+class FakeGPT4All:
+    def __init__(self, tokens_per_sec: float = 20.0, prefill_ms: float = 1.0, reply: str = REPLY):
+        self.model = FakeLLModel(tokens_per_sec, prefill_ms, reply)
+
+    @contextmanager
+    def chat_session(self):
+        yield self
+
+    def generate(self, prompt, max_tokens=200, streaming=False, callback=None, **kwargs):
+        tokens = self.model.prompt_model_streaming(
+            prompt, "%1", callback or (lambda *_: True), n_predict=max_tokens, reset_context=True
+        )
+        return tokens if streaming else "".join(tokens)
+
+
+def _codes(resource: str) -> list:
+    return [f"{resource[:3].upper()}-{i:04d}" for i in range(5)]
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    stub: "StubBackend"
+    # cabeçalho e corpo saem em writes separados; com Nagle ligado o
+    # delayed ACK do cliente somaria ~40 ms a cada resposta keep-alive
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.stub._lock:
+            self.stub.connections += 1
+
+    def do_GET(self):
+        status, delay = self.stub._next()
+        time.sleep(delay)
+        if status != 200:
+            self.send_error(status)
+            return
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        resource = query.get("resourceName", "")
+        if url.path.startswith("/orchestration/full-data/"):
+            user_id = url.path.rsplit("/", 1)[-1]
+            body = {"user": {"id": user_id, "companyId": f"company-{user_id}"}}
+        elif url.path == "/orchestration/inventory-quantity":
+            body = {"amount": len(resource) * 7}
+        elif url.path == "/orchestration/inventory-quantities" and self.stub.bulk:
+            names = [n for n in query.get("resourceNames", "").split(",") if n]
+            body = {"items": [{"resourceName": n, "amount": len(n) * 7} for n in names]}
+        elif url.path == "/orchestration/inventory-codes-bulk" and self.stub.bulk:
+            names = [n for n in query.get("resourceNames", "").split(",") if n]
+            body = {"items": [{"resourceName": n, "codes": _codes(n)} for n in names]}
+        elif url.path == "/orchestration/resources":
+            body = {"resources": [{"name": name} for name in CATALOG]}
+        elif url.path == "/orchestration/inventory-codes":
+            body = {"codes": _codes(resource)}
+        else:
+            self.send_error(404)
+            return
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubBackend:
+    """
+    Servidor local dos endpoints `/orchestration/*` com latência fixa por
+    requisição. Use como context manager; `url` aponta para ele.
+
+    Falhas injetáveis a qualquer momento: `status` (ex.: 503 em todas as
+    respostas) e `slow` (quantas das próximas requisições levam
+    `slow_latency` segundos). Com `bulk = False` os endpoints em lote
+    respondem 404, como num backend que ainda não os tem.
+    """
+    def __init__(self, latency_ms: float = 20.0):
+        self.latency = latency_ms / 1000
+        self.status = 200
+        self.slow = 0
+        self.slow_latency = 1.0
+        self.bulk = True
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        handler = type("Handler", (_StubHandler,), {"stub": self})
+        handler.protocol_version = "HTTP/1.1"  # keep-alive
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def _next(self) -> tuple:
+        with self._lock:
+            self.requests += 1
+            if self.slow > 0:
+                self.slow -= 1
+                return self.status, self.slow_latency
+            return self.status, self.latency
+
+    def __enter__(self) -> "StubBackend":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
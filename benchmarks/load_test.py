@@ -0,0 +1,152 @@
+"""
+Teste de carga de `src.main.app` com modelo e backend falsos.
+
+Dispara clientes concorrentes contra `POST /chat/` (via ASGI, sem rede) e
+mede latência p50/p95/p99 e vazão separadamente para os caminhos fallback,
+inventory, codes e llm do `ChatService.generate_response`. O GPT4All é
+trocado por `FakeGPT4All` e o backend por `StubBackend` (ver fakes.py).
+
+    python -m benchmarks.load_test [--requests 200] [--concurrency 4]
+        [--tokens-per-sec 20] [--prefill-ms 1] [--backend-ms 20]
+        [--save benchmarks/baseline.json] [--compare benchmarks/baseline.json]
+
+Mensagens e empresas variam a cada requisição para que os caches de
+backend e de respostas não mascarem o custo de cada caminho.
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+import warnings
+import argparse
+import platform
+from itertools import count
+
+import httpx
+import numpy as np
+
+from benchmarks.fakes import FakeGPT4All, StubBackend
+
+PATHS = {
+    "fallback":  lambda i: {"message": f"qual a previsão do tempo para o dia {i}?"},
+    "inventory": lambda i: {"message": "Quantos parafusos eu tenho no estoque?", "user_id": f"u{i}"},
+    "codes":     lambda i: {"message": "mostrar códigos do parafuso", "company_id": f"c{i}"},
+    "llm":       lambda i: {"message": f"Como ver o status do pedido {i}?"},
+}
+
+
+async def _drive(client: httpx.AsyncClient, make, requests: int, concurrency: int) -> dict:
+    latencies, statuses = [], {}
+    ids = count()
+
+    async def worker():
+        while (i := next(ids)) < requests:
+            start = time.perf_counter()
+            response = await client.post("/chat/", json=make(i))
+            elapsed = time.perf_counter() - start
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code == 200:
+                latencies.append(elapsed)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+
+    ms = np.asarray(latencies) * 1000 if latencies else np.zeros(1)
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "requests": requests,
+        "ok": len(latencies),
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "throughput_rps": round(len(latencies) / wall, 2),
+    }
+
+
+async def run(args) -> dict:
+    # importado aqui para que BACKEND_URL já esteja no ambiente
+    from src.main import app
+    from src.services import chat_service
+    from src.utils import product_extractor
+
+    fake = FakeGPT4All(tokens_per_sec=args.tokens_per_sec, prefill_ms=args.prefill_ms)
+    chat_service.get_model = lambda: fake
+    product_extractor._get_model = lambda: fake
+    # o caminho llm mede o modelo, não a recuperação
+    chat_service.CHAT_MODE = "llm"
+    warnings.filterwarnings("ignore", category=UserWarning)
+    for name in list(logging.root.manager.loggerDict):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for path in args.paths:
+            # uma rodada curta de aquecimento (prefixo, conexões keep-alive)
+            await _drive(client, lambda i: PATHS[path](-1 - i), 2, 1)
+            results[path] = await _drive(client, PATHS[path], args.requests, args.concurrency)
+    return results
+
+
+def _compare(results: dict, baseline: dict) -> None:
+    print("\nvs baseline:")
+    for path, cur in results.items():
+        old = baseline.get("paths", {}).get(path)
+        if not old:
+            continue
+        deltas = []
+        for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+            if old[key]:
+                deltas.append(f"{key} {100 * (cur[key] - old[key]) / old[key]:+6.1f}%")
+        print(f"  {path:<10}" + "  ".join(deltas))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200, help="requisições por caminho")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--tokens-per-sec", type=float, default=20.0)
+    parser.add_argument("--prefill-ms", type=float, default=1.0, help="custo por token de prompt")
+    parser.add_argument("--backend-ms", type=float, default=20.0, help="latência do backend falso")
+    parser.add_argument("--paths", nargs="+", default=list(PATHS), choices=list(PATHS))
+    parser.add_argument("--save", help="grava o resultado em JSON (baseline)")
+    parser.add_argument("--compare", help="compara com um JSON gravado por --save")
+    args = parser.parse_args()
+
+    with StubBackend(latency_ms=args.backend_ms) as stub:
+        os.environ["BACKEND_URL"] = stub.url
+        results = asyncio.run(run(args))
+
+    print(f"{'caminho':<10} {'ok':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8}  status")
+    for path, r in results.items():
+        print(
+            f"{path:<10} {r['ok']:>6} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+            f"{r['p99_ms']:>9.2f} {r['throughput_rps']:>8.2f}  {r['statuses']}"
+        )
+
+    report = {
+        "meta": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "tokens_per_sec": args.tokens_per_sec,
+            "prefill_ms": args.prefill_ms,
+            "backend_ms": args.backend_ms,
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "paths": results,
+    }
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            _compare(results, json.load(f))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline gravada em {args.save}")
+
+
+if __name__ == "__main__":
+    main()
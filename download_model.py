@@ -1,38 +1,190 @@
-import os, sys, glob, shutil, logging
-from dotenv import load_dotenv
-from huggingface_hub import snapshot_download
-
-load_dotenv()
-REPO   = os.getenv("MODEL_REPO")
-TOKEN  = os.getenv("HF_TOKEN") or None
-
-if not REPO:
-    print("❌  Defina MODEL_REPO no .env", file=sys.stderr)
-    sys.exit(1)
-
-logging.basicConfig(level=logging.INFO)
-logging.info("🔽 Baixando %s …", REPO)
-
-snapshot_download(
-    repo_id   = REPO,
-    local_dir = "model",
-    token     = TOKEN,
-    local_dir_use_symlinks=False,
-)
-
-#
-#  Escolhe *Q5_0.gguf se existir; senão cai para o maior arquivo
-#
-candidates = glob.glob("model/**/*.Q5_0.gguf", recursive=True)
-if not candidates:
-    candidates = glob.glob("model/**/*.gguf", recursive=True)
-
-if not candidates:
-    print("❌  Nenhum .gguf encontrado em model/", file=sys.stderr)
-    sys.exit(1)
-
-best = max(candidates, key=os.path.getsize)
-dst  = "model/model.gguf"
-
-shutil.move(best, dst)
-logging.info("✅  Copiado %s → %s", best, dst)
+"""
+Baixa o snapshot de MODEL_REPO e padroniza o GGUF escolhido em
+model/model.gguf.
+
+MODEL_SELECT=bench (padrão): cada quantização do snapshot roda, num processo
+próprio, um benchmark curto com as perguntas reais de EXAMPLES (tempo de
+carga, prefill e decodificação em tokens/s, pico de RSS e acerto da rota
+/dashboard esperada). Vence a variante mais rápida com acerto >=
+MODEL_MIN_ACCURACY. O relatório vai para model/selection.json e é logado
+pelo serviço no startup.
+
+MODEL_SELECT=size: heurística antiga (*.Q5_0.gguf ou o maior arquivo).
+
+    python download_model.py                  # baixa e escolhe
+    python download_model.py --bench X.gguf   # mede uma variante (JSON)
+"""
+import os, sys, re, glob, json, time, shutil, logging, resource, argparse, subprocess
+from typing import Callable, List, Optional, Tuple
+
+SELECT       = os.getenv("MODEL_SELECT", "bench")
+MIN_ACCURACY = float(os.getenv("MODEL_MIN_ACCURACY", "0.85"))
+BENCH_TOKENS = int(os.getenv("MODEL_BENCH_TOKENS", "48"))
+BENCH_TIMEOUT = float(os.getenv("MODEL_BENCH_TIMEOUT", "900"))
+MODEL_DIR    = "model"
+DST          = os.path.join(MODEL_DIR, "model.gguf")
+REPORT       = os.path.join(MODEL_DIR, "selection.json")
+
+
+def _questions() -> List[Tuple[str, str]]:
+    """
+    (pergunta, rota esperada) de cada par de EXAMPLES.
+    """
+    from src.config.constants import EXAMPLES
+    pairs = re.findall(r"Usuário:\s*(.+?)\nAssistente:\s*(.+?)(?:\n\n|$)", EXAMPLES, re.S)
+    return [(q.strip(), re.search(r"/dashboard[\w/\-]*", a).group(0)) for q, a in pairs]
+
+
+def _prompt(question: str) -> str:
+    # as rotas vêm só do SERVICE_INFO: o modelo precisa escolher a certa
+    from src.config.constants import SERVICE_INFO
+    services = "\n".join(f"- {txt}" for txt in SERVICE_INFO.values())
+    return (
+        "<|begin_of_text|><|start_header_id|>system\n"
+        "Você é o assistente do RM Traceability SaaS. Rotas do sistema:\n"
+        f"{services}\n"
+        "Responda em português, em uma frase, citando a rota.\n<|end_header_id|>\n\n"
+        f"<|start_header_id|>user\n{question}\n<|end_header_id|>\n\n"
+        "<|start_header_id|>assistant\n"
+    )
+
+
+def _load_gpt4all(path: str):
+    from gpt4all import GPT4All
+    threads = int(os.getenv("MODEL_THREADS", "0")) or os.cpu_count() or 4
+    return GPT4All(os.path.basename(path), model_path=os.path.dirname(path) or ".",
+                   allow_download=False, n_threads=threads)
+
+
+def bench(path: str, loader: Callable[[str], object] = _load_gpt4all) -> dict:
+    """
+    Mede uma variante no processo corrente.
+    """
+    start = time.perf_counter()
+    llm = loader(path).model
+    load_s = time.perf_counter() - start
+
+    questions = _questions()
+    prompt_tokens = prefill_s = out_tokens = decode_s = 0.0
+    correct, total_s = 0, 0.0
+    for question, route in questions:
+        out: List[str] = []
+        marks: List[float] = []
+
+        def callback(_token_id: int, response: str) -> bool:
+            marks.append(time.perf_counter())
+            out.append(response)
+            return True
+
+        t0 = time.perf_counter()
+        llm.prompt_model(_prompt(question), "%1", callback, n_predict=BENCH_TOKENS,
+                         temp=0.0, top_k=1, reset_context=True)
+        end = time.perf_counter()
+        total_s += end - t0
+        if marks:
+            # até o 1º token é prefill; o resto, decodificação
+            prompt_tokens += llm.context.n_past - len(marks)
+            prefill_s += marks[0] - t0
+            out_tokens += len(marks) - 1
+            decode_s += marks[-1] - marks[0]
+        correct += route in "".join(out)
+
+    n = len(questions)
+    return {
+        "file": os.path.basename(path),
+        "size_bytes": os.path.getsize(path),
+        "load_s": round(load_s, 3),
+        "prefill_tps": round(prompt_tokens / prefill_s, 1) if prefill_s else None,
+        "decode_tps": round(out_tokens / decode_s, 1) if decode_s else None,
+        "mean_s": round(total_s / n, 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "accuracy": round(correct / n, 3),
+    }
+
+
+def _bench_subprocess(path: str) -> dict:
+    # um processo por variante: pico de RSS isolado e memória devolvida
+    try:
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--bench", path],
+            capture_output=True, text=True, timeout=BENCH_TIMEOUT,
+        )
+        if proc.returncode == 0:
+            return json.loads(proc.stdout.strip().splitlines()[-1])
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"
+    except subprocess.TimeoutExpired:
+        error = f"timeout após {BENCH_TIMEOUT:.0f}s"
+    return {"file": os.path.basename(path), "size_bytes": os.path.getsize(path), "error": error}
+
+
+def choose(results: List[dict], min_accuracy: float = MIN_ACCURACY) -> Optional[dict]:
+    """
+    A mais rápida (tempo médio por pergunta) entre as que passam no acerto
+    de rotas; se nenhuma passar, a mais precisa (empate: a mais rápida).
+    """
+    ok = [r for r in results if "error" not in r]
+    for r in ok:
+        r["passed"] = r["accuracy"] >= min_accuracy
+    passed = [r for r in ok if r["passed"]]
+    if passed:
+        return min(passed, key=lambda r: r["mean_s"])
+    if ok:
+        logging.warning("⚠️  Nenhuma variante atingiu acerto %.2f; usando a mais precisa", min_accuracy)
+        return min(ok, key=lambda r: (-r["accuracy"], r["mean_s"]))
+    return None
+
+
+def _by_size(candidates: List[str]) -> str:
+    q5 = [c for c in candidates if c.endswith(".Q5_0.gguf")]
+    return max(q5 or candidates, key=os.path.getsize)
+
+
+def main() -> None:
+    from dotenv import load_dotenv
+    from huggingface_hub import snapshot_download
+
+    load_dotenv()
+    repo  = os.getenv("MODEL_REPO")
+    token = os.getenv("HF_TOKEN") or None
+    if not repo:
+        print("❌  Defina MODEL_REPO no .env", file=sys.stderr)
+        sys.exit(1)
+
+    logging.basicConfig(level=logging.INFO)
+    logging.info("🔽 Baixando %s …", repo)
+    snapshot_download(repo_id=repo, local_dir=MODEL_DIR, token=token, local_dir_use_symlinks=False)
+
+    candidates = sorted(c for c in glob.glob(f"{MODEL_DIR}/**/*.gguf", recursive=True) if c != DST)
+    if not candidates:
+        print(f"❌  Nenhum .gguf encontrado em {MODEL_DIR}/", file=sys.stderr)
+        sys.exit(1)
+
+    report = {"repo": repo, "mode": SELECT, "min_accuracy": MIN_ACCURACY, "candidates": []}
+    if SELECT == "bench" and len(candidates) > 1:
+        for path in candidates:
+            logging.info("⏱️  Benchmark de %s …", path)
+            result = _bench_subprocess(path)
+            logging.info("   %s", result)
+            report["candidates"].append(result)
+        chosen = choose(report["candidates"])
+        by_file = {os.path.basename(c): c for c in candidates}
+        best = by_file[chosen["file"]] if chosen else _by_size(candidates)
+    else:
+        best = _by_size(candidates)
+
+    report["selected"] = os.path.basename(best)
+    report["created_at"] = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    shutil.move(best, DST)
+    with open(REPORT, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    logging.info("✅  Copiado %s → %s (relatório em %s)", best, DST, REPORT)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Baixa e escolhe a variante GGUF do modelo.")
+    parser.add_argument("--bench", metavar="GGUF", help="só mede a variante e imprime o JSON")
+    args = parser.parse_args()
+    if args.bench:
+        print(json.dumps(bench(args.bench), ensure_ascii=False))
+    else:
+        main()
@@ -0,0 +1,70 @@
+"""
+Reexecuta mensagens de um arquivo JSONL pelo ChatService, sem subir a API.
+
+    python replay.py entrada.jsonl > saida.jsonl
+    cat entrada.jsonl | python replay.py - --chunk 200
+
+Cada linha de entrada é um objeto com `message` (e opcionalmente
+`session_id`, `user_id`, `company_id`); cada linha de saída repete o objeto
+com `response`/`session_id` ou `error`/`status`, na mesma ordem. A entrada é
+processada em blocos, então a saída é escrita conforme avança.
+"""
+import sys, json, time, logging, argparse
+from itertools import islice
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from src.services.batch_service import BatchService  # noqa: E402
+
+logging.basicConfig(level=logging.INFO)
+
+
+def _read(lines):
+    for n, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError:
+            logging.warning("Linha %d ignorada: JSON inválido", n)
+            continue
+        if not isinstance(item, dict) or "message" not in item:
+            logging.warning("Linha %d ignorada: sem campo 'message'", n)
+            continue
+        yield item
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay de mensagens JSONL pelo chat.")
+    parser.add_argument("input", help="arquivo JSONL ou '-' para stdin")
+    parser.add_argument("-o", "--output", help="arquivo de saída (padrão: stdout)")
+    parser.add_argument("--chunk", type=int, default=100, help="itens por bloco (padrão: 100)")
+    args = parser.parse_args(argv)
+
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    dst = sys.stdout if not args.output else open(args.output, "w", encoding="utf-8")
+    items = _read(src)
+    total, errors, start = 0, 0, time.perf_counter()
+    try:
+        # blocos em sequência preservam a ordem dos turnos de uma mesma sessão
+        while chunk := list(islice(items, args.chunk)):
+            for item, result in zip(chunk, BatchService.run(chunk)):
+                errors += "error" in result
+                dst.write(json.dumps({**item, **result}, ensure_ascii=False) + "\n")
+            dst.flush()
+            total += len(chunk)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+
+    logging.info("✅  %d mensagens (%d erros) em %.1fs", total, errors, time.perf_counter() - start)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,26 @@
+import logging
+from fastapi import APIRouter
+
+from src.models.cache_invalidation import CacheInvalidation
+from src.services.ml_service import MLService
+from src.services.answer_cache import answer_cache
+
+router = APIRouter()
+logger = logging.getLogger("cache-api")
+
+@router.post("/invalidate")
+async def invalidate_endpoint(request: CacheInvalidation):
+    """
+    Chamado pelo backend quando o estoque/códigos de uma empresa mudam.
+    Sem campos, esvazia todos os caches.
+    """
+    removed = MLService.invalidate_cache(
+        company_id=request.company_id,
+        resource_name=request.resource_name,
+        user_id=request.user_id,
+    )
+    return {"removed": removed}
+
+@router.get("/stats")
+async def stats_endpoint():
+    return {**MLService.cache_stats(), "answers": answer_cache.stats()}
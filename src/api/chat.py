@@ -1,12 +1,27 @@
+import json
 import logging
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
 from src.models.chat_request import ChatRequest
+from src.models.chat_batch_request import ChatBatchRequest
 from src.services.chat_service import ChatService
+from src.services.batch_service import BatchService, BATCH_MAX_ITEMS
+from src.utils.worker_pool import io_pool, PoolSaturated
 
 router = APIRouter()
 logger = logging.getLogger("chat-api")
 
+def _saturated(exc: PoolSaturated) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Serviço sobrecarregado, tente novamente em instantes.",
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 @router.post("/")
 async def chat_endpoint(
     request: ChatRequest,
@@ -18,14 +33,77 @@ async def chat_endpoint(
 
     final_session_id = request.session_id or session_id
 
-    response_text, new_session_id = ChatService.generate_response(
+    try:
+        response_text, new_session_id = await io_pool.run(
+            ChatService.generate_response,
+            user_message=user_message,
+            session_id=final_session_id,
+            user_id=request.user_id,
+            company_id=request.company_id
+        )
+    except PoolSaturated as exc:
+        raise _saturated(exc)
+
+    logger.info(f"Resposta gerada: {response_text}")
+    logger.info(f"Session ID: {new_session_id}")
+
+    return {"response": response_text, "session_id": new_session_id}
+
+@router.post("/stream")
+async def chat_stream_endpoint(
+    request: ChatRequest,
+    session_id: str = Query(None, description="ID da sessão para histórico da conversa")
+):
+    user_message = request.message.strip()
+    if not user_message:
+        raise HTTPException(status_code=400, detail="Mensagem vazia.")
+
+    events = io_pool.stream(
+        ChatService.stream_response,
         user_message=user_message,
-        session_id=final_session_id,
+        session_id=request.session_id or session_id,
         user_id=request.user_id,
         company_id=request.company_id
     )
+    # o primeiro evento é aguardado antes de abrir o stream para que
+    # saturação e erros do modelo ainda virem status HTTP
+    try:
+        first = await events.__anext__()
+    except PoolSaturated as exc:
+        raise _saturated(exc)
 
-    logger.info(f"Resposta gerada: {response_text}")
-    logger.info(f"Session ID: {new_session_id}")
+    async def body():
+        try:
+            yield _sse(*first)
+            async for event, data in events:
+                if event == "done":
+                    logger.info(f"Resposta gerada: {data['response']}")
+                    logger.info(f"Session ID: {data['session_id']}")
+                yield _sse(event, data)
+        except Exception as exc:
+            logger.exception("Falha durante o stream")
+            detail = exc.detail if isinstance(exc, HTTPException) else str(exc)
+            yield _sse("error", {"detail": detail})
+        finally:
+            # cliente desconectado: interrompe a geração e libera os slots
+            await events.aclose()
 
-    return {"response": response_text, "session_id": new_session_id}
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/batch")
+async def chat_batch_endpoint(request: ChatBatchRequest):
+    if not request.messages:
+        raise HTTPException(status_code=400, detail="Lote vazio.")
+    if len(request.messages) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Lote acima de {BATCH_MAX_ITEMS} mensagens.")
+
+    try:
+        results = await io_pool.run(BatchService.run, [m.model_dump() for m in request.messages])
+    except PoolSaturated as exc:
+        raise _saturated(exc)
+
+    return {"results": results}
@@ -0,0 +1,21 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from src.services.warmup import warmup
+
+router = APIRouter()
+
+@router.get("/live")
+async def live_endpoint():
+    """
+    Processo de pé e atendendo (não depende do modelo).
+    """
+    return {"status": "ok"}
+
+@router.get("/ready")
+async def ready_endpoint():
+    """
+    200 quando o aquecimento terminou; 503 enquanto carrega ou se falhou.
+    """
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if warmup.ready else 503)
@@ -0,0 +1,59 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.services.chat_service import SESSIONS
+from src.services.ml_service import MLService
+from src.services.answer_cache import answer_cache
+from src.utils.prefix_cache import prefix_cache
+from src.utils.worker_pool import io_pool, llm_pool
+from src.utils.metrics import REGISTRY
+
+router = APIRouter()
+
+def _cache_stats() -> dict:
+    return {**MLService.cache_stats(), "answers": answer_cache.stats(), "prefix": prefix_cache.stats()}
+
+def _cache_hits():
+    for name, s in _cache_stats().items():
+        yield "", {"cache": name}, s["hits"] + s.get("similar_hits", 0)
+
+def _cache_misses():
+    for name, s in _cache_stats().items():
+        yield "", {"cache": name}, s["misses"]
+
+def _cache_ratio():
+    for name, s in _cache_stats().items():
+        hits = s["hits"] + s.get("similar_hits", 0)
+        total = hits + s["misses"]
+        yield "", {"cache": name}, hits / total if total else 0.0
+
+def _sessions():
+    stats = SESSIONS.stats()
+    yield "", {"backend": stats["backend"]}, stats["sessions"]
+
+def _sessions_bytes():
+    stats = SESSIONS.stats()
+    yield "", {"backend": stats["backend"]}, stats["memory_bytes"]
+
+def _pool_in_flight():
+    for pool in (io_pool, llm_pool):
+        yield "", {"pool": pool.name}, pool.stats()["in_flight"]
+
+def _pool_rejected():
+    for pool in (io_pool, llm_pool):
+        yield "", {"pool": pool.name}, pool.stats()["rejected"]
+
+REGISTRY.collector("chat_cache_hits_total", "counter", "Acertos por cache.", _cache_hits)
+REGISTRY.collector("chat_cache_misses_total", "counter", "Faltas por cache.", _cache_misses)
+REGISTRY.collector("chat_cache_hit_ratio", "gauge", "Taxa de acerto por cache.", _cache_ratio)
+REGISTRY.collector("chat_sessions", "gauge", "Sessões ativas no store.", _sessions)
+REGISTRY.collector("chat_sessions_bytes", "gauge", "Memória aproximada das sessões.", _sessions_bytes)
+REGISTRY.collector("chat_pool_in_flight", "gauge", "Tarefas em execução ou na fila por pool.", _pool_in_flight)
+REGISTRY.collector("chat_pool_rejected_total", "counter", "Tarefas rejeitadas por pool saturado.", _pool_rejected)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """
+    Métricas no formato de exposição texto do Prometheus.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+
+from src.services.chat_service import SESSIONS
+from src.utils import model_registry
+
+router = APIRouter()
+
+@router.get("/models")
+async def models_endpoint():
+    """
+    Modelos residentes no processo, com tempo de carga e RSS incremental.
+    """
+    return {"models": model_registry.stats()}
+
+@router.get("/sessions")
+async def sessions_endpoint():
+    """
+    Quantidade de sessões ativas e memória aproximada ocupada.
+    """
+    return SESSIONS.stats()
@@ -0,0 +1,103 @@
+import os
+import json
+import time
+import socket
+import logging
+from typing import Iterator, Optional
+
+from src.utils.worker_pool import PoolSaturated
+
+logger = logging.getLogger("inference-client")
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    logger.addHandler(handler)
+
+# com INFERENCE_SOCKET definido a API não carrega modelos: tudo vai ao
+# servidor de inferência (src/inference/server.py)
+INFERENCE_SOCKET  = os.getenv("INFERENCE_SOCKET", "")
+INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", "120"))
+
+
+class InferenceError(RuntimeError):
+    pass
+
+
+class InferenceClient:
+    """
+    Cliente síncrono (uso a partir das threads dos pools). Cada chamada abre
+    sua conexão; fechar o gerador de `stream` fecha o socket e o servidor
+    interrompe a geração se ninguém mais a acompanha. Estourar o timeout
+    ainda na fila do servidor vira `PoolSaturated` (503 com Retry-After),
+    como a admissão do pool local.
+    """
+    def __init__(self, path: str, timeout: float = INFERENCE_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        # fila justa por processo da API
+        self.client_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    def _request(self, payload: dict) -> Iterator[dict]:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+            sock.sendall(json.dumps({**payload, "client": self.client_id}, ensure_ascii=False).encode("utf-8") + b"\n")
+            with sock.makefile("r", encoding="utf-8") as lines:
+                for line in lines:
+                    msg = json.loads(line)
+                    if "error" in msg:
+                        raise InferenceError(msg["error"])
+                    yield msg
+                    if msg.get("done"):
+                        return
+            raise InferenceError("conexão encerrada pelo servidor de inferência")
+        finally:
+            sock.close()
+
+    def stream(self, op: str, model: str = "main", **payload) -> Iterator[str]:
+        started = False
+        try:
+            for msg in self._request({"op": op, "model": model, **payload}):
+                if "token" in msg:
+                    yield msg["token"]
+                started = True
+        except socket.timeout:
+            if started:
+                raise
+            logger.warning("Timeout na fila do servidor de inferência (%s)", op)
+            raise PoolSaturated("inference")
+
+    def generate(self, prefix: str, suffix: str, **kwargs) -> str:
+        return "".join(self.stream("generate", prefix=prefix, suffix=suffix, kwargs=kwargs))
+
+    def chat(self, prompt: str, model: str = "main", **kwargs) -> str:
+        return "".join(self.stream("chat", model=model, prompt=prompt, kwargs=kwargs))
+
+    def prefill(self, prefix: str) -> None:
+        for _ in self.stream("prefill", prefix=prefix):
+            pass
+
+    def stats(self) -> dict:
+        msgs = self._request({"op": "stats"})
+        try:
+            return next(msgs)["stats"]
+        finally:
+            msgs.close()
+
+    def wait_ready(self, timeout: float = INFERENCE_TIMEOUT) -> dict:
+        """
+        Aguarda o servidor aceitar conexões (ele pode subir depois da API).
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                return self.stats()
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.5)
+
+
+inference: Optional[InferenceClient] = InferenceClient(INFERENCE_SOCKET) if INFERENCE_SOCKET else None
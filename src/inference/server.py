@@ -0,0 +1,254 @@
+"""
+Servidor de inferência: um processo dono do(s) modelo(s) GGUF, atendendo os
+workers da API por um socket Unix.
+
+    MODEL_THREADS=8 python -m src.inference.server [--socket /tmp/rm-chat-inference.sock]
+
+Protocolo: uma requisição JSON por conexão, seguida de linhas JSON com
+{"token": ...} e uma linha final {"done": true} ou {"error": ...}.
+Operações: generate (prefixo + sufixo via PrefixCache), chat (chat_session,
+usado pelo extrator), prefill (só avalia o prefixo) e stats.
+
+O GPT4All não agrupa sequências num mesmo passo de decodificação, então as
+gerações rodam uma por vez numa única thread, com fila justa (round-robin)
+entre os clientes (um por processo da API). Requisições idênticas em
+andamento ou na fila são deduplicadas: quem chega depois recebe os tokens já
+gerados e acompanha o restante.
+"""
+import os
+import json
+import asyncio
+import logging
+import argparse
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+from src.utils import model_registry
+from src.utils.prefix_cache import prefix_cache
+
+logger = logging.getLogger("inference")
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    logger.addHandler(handler)
+
+DEFAULT_SOCKET = "/tmp/rm-chat-inference.sock"
+MAX_LINE = 16 * 2**20  # o prefixo do sistema viaja em cada requisição
+
+
+def _default_models() -> Dict[str, Callable]:
+    from src.utils.llm import get_model
+    from src.utils.product_extractor import _get_model
+    return {"main": get_model, "extractor": _get_model}
+
+
+class _Job:
+    __slots__ = ("key", "request", "client", "stop", "subscribers", "history", "done")
+
+    def __init__(self, key: str, request: dict, client: str):
+        self.key = key
+        self.request = request
+        self.client = client
+        self.stop = threading.Event()
+        self.subscribers: List[asyncio.Queue] = []
+        self.history: List[dict] = []
+        self.done = False
+
+
+class InferenceServer:
+    def __init__(self, path: str = DEFAULT_SOCKET, models: Optional[Dict[str, Callable]] = None):
+        self.path = path
+        self._models = models
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        # só tocados na thread do event loop
+        self._jobs: Dict[str, _Job] = {}
+        # fila justa, compartilhada com a thread de geração
+        self._cond = threading.Condition()
+        self._queues: Dict[str, Deque[_Job]] = {}
+        self._order: Deque[str] = deque()
+        self._closed = False
+        self._worker: Optional[threading.Thread] = None
+        self.completed = self.deduped = self.cancelled = 0
+
+    # ───────────────────────── event loop ─────────────────────────
+    async def start(self) -> None:
+        if self._models is None:
+            self._models = _default_models()
+        self._loop = asyncio.get_running_loop()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._worker = threading.Thread(target=self._work, name="inference", daemon=True)
+        self._worker.start()
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path, limit=MAX_LINE)
+        logger.info("Servidor de inferência em %s", self.path)
+
+    async def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def stats(self) -> dict:
+        with self._cond:
+            queued = {client: len(q) for client, q in self._queues.items()}
+        return {
+            "jobs": len(self._jobs),
+            "queued": queued,
+            "completed": self.completed,
+            "deduped": self.deduped,
+            "cancelled": self.cancelled,
+            "prefix_cache": prefix_cache.stats(),
+        }
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        queue: asyncio.Queue = asyncio.Queue()
+        job = None
+        try:
+            request = json.loads(await reader.readline())
+            if request.get("op") == "stats":
+                await self._write(writer, {"done": True, "stats": self.stats()})
+                return
+            job = self._subscribe(request, queue)
+            while True:
+                msg = await queue.get()
+                await self._write(writer, msg)
+                if "done" in msg or "error" in msg:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as exc:
+            logger.exception("Requisição inválida")
+            try:
+                await self._write(writer, {"error": str(exc)})
+            except ConnectionError:
+                pass
+        finally:
+            if job is not None:
+                self._unsubscribe(job, queue)
+            writer.close()
+
+    @staticmethod
+    async def _write(writer: asyncio.StreamWriter, msg: dict) -> None:
+        writer.write(json.dumps(msg, ensure_ascii=False).encode("utf-8") + b"\n")
+        await writer.drain()
+
+    def _subscribe(self, request: dict, queue: asyncio.Queue) -> _Job:
+        if request.get("op") not in ("generate", "chat", "prefill"):
+            raise ValueError(f"operação desconhecida: {request.get('op')}")
+        client = str(request.pop("client", "anon"))
+        key = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        job = self._jobs.get(key)
+        if job is not None and not job.done and not job.stop.is_set():
+            self.deduped += 1
+            for msg in job.history:
+                queue.put_nowait(msg)
+        else:
+            job = self._jobs[key] = _Job(key, request, client)
+            with self._cond:
+                if client not in self._queues:
+                    self._queues[client] = deque()
+                    self._order.append(client)
+                self._queues[client].append(job)
+                self._cond.notify()
+        job.subscribers.append(queue)
+        return job
+
+    def _unsubscribe(self, job: _Job, queue: asyncio.Queue) -> None:
+        if queue in job.subscribers:
+            job.subscribers.remove(queue)
+        if not job.subscribers and not job.done:
+            # ninguém mais quer a resposta: interrompe ou descarta da fila
+            job.stop.set()
+            self.cancelled += 1
+            self._jobs.pop(job.key, None)
+
+    def _publish(self, job: _Job, msg: dict) -> None:
+        job.history.append(msg)
+        for queue in job.subscribers:
+            queue.put_nowait(msg)
+        if "done" in msg or "error" in msg:
+            # no loop, como `_unsubscribe`: um job é concluído ou cancelado
+            if "done" in msg and not job.stop.is_set():
+                self.completed += 1
+            job.done = True
+            if self._jobs.get(job.key) is job:
+                del self._jobs[job.key]
+
+    # ───────────────────────── thread de geração ─────────────────────────
+    def _next(self) -> Optional[_Job]:
+        with self._cond:
+            while not self._order and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                return None
+            client = self._order.popleft()
+            queue = self._queues[client]
+            job = queue.popleft()
+            if queue:
+                self._order.append(client)
+            else:
+                del self._queues[client]
+            return job
+
+    def _emit(self, job: _Job, msg: dict) -> None:
+        self._loop.call_soon_threadsafe(self._publish, job, msg)
+
+    def _work(self) -> None:
+        while (job := self._next()) is not None:
+            if job.stop.is_set():
+                continue
+            try:
+                # saiu da fila: o cliente passa a contar o timeout da geração
+                self._emit(job, {"started": True})
+                self._run(job)
+                self._emit(job, {"done": True})
+            except Exception as exc:
+                logger.exception("Falha na geração")
+                self._emit(job, {"error": f"{type(exc).__name__}: {exc}"})
+
+    def _run(self, job: _Job) -> None:
+        req = job.request
+        model = self._models[req.get("model", "main")]()
+        kwargs = req.get("kwargs", {})
+        callback = lambda _id, _txt: not job.stop.is_set()
+        with model_registry.generation_lock(model):
+            if req["op"] == "prefill":
+                prefix_cache.prefill(model, req["prefix"])
+                return
+            if req["op"] == "generate":
+                tokens = prefix_cache.stream(model, req["prefix"], req["suffix"], callback=callback, **kwargs)
+                for token in tokens:
+                    self._emit(job, {"token": token})
+                return
+            with model.chat_session() as chat:
+                for token in chat.generate(prompt=req["prompt"], streaming=True, callback=callback, **kwargs):
+                    self._emit(job, {"token": token})
+
+
+async def _main(path: str) -> None:
+    server = InferenceServer(path)
+    await server.start()
+    # carrega os modelos antes do primeiro pedido
+    await asyncio.get_running_loop().run_in_executor(None, lambda: [m() for m in server._models.values()])
+    logger.info("Modelos carregados: %s", model_registry.stats())
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor de inferência local (socket Unix).")
+    parser.add_argument("--socket", default=os.getenv("INFERENCE_SOCKET") or DEFAULT_SOCKET)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_main(args.socket))
+    except KeyboardInterrupt:
+        pass
@@ -3,21 +3,55 @@ from fastapi import FastAPI
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
 
+# antes dos imports de src: vários módulos leem o ambiente ao serem importados
+load_dotenv()
+
 from src.api.chat import router as chat_router
+from src.api.system import router as system_router
+from src.api.cache import router as cache_router
+from src.api.metrics import router as metrics_router
+from src.api.health import router as health_router
 from src.utils.product_extractor import _get_model
-from src.utils.llm               import get_model
+from src.utils.llm               import get_model, log_selection_report
+from src.services.chat_service   import ChatService
+from src.services.ml_service     import MLService
+from src.services.backend_client import backend
+from src.services.warmup         import warmup
+from src.services.retrieval      import retriever, llm_enabled
+from src.inference.client        import inference
+from src.utils.request_context   import RequestContextMiddleware, install_log_request_id
 
-load_dotenv()
+install_log_request_id()
 logger = logging.getLogger("chat-microservice")
 logger.setLevel(logging.INFO)
 
+def _warmup_steps() -> list:
+    steps = [
+        ("action_model", MLService.load_action_model),
+        ("retriever", retriever.warm),
+    ]
+    if not llm_enabled():
+        logger.info("CHAT_MODE=retrieval: modelo não será carregado.")
+        return steps
+    if inference is not None:
+        # os modelos vivem no servidor de inferência; só avalia o prefixo lá
+        return steps + [("system_prefix", ChatService.warm_prefix)]
+    # o GGUF é mapeado em memória pelo llama.cpp (padrão do gpt4all)
+    return steps + [
+        ("llm", get_model),
+        ("extractor", _get_model),
+        ("system_prefix", ChatService.warm_prefix),
+    ]
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    logger.info("🔄  Warm-up: carregando modelos…")
-    _get_model()
-    get_model()
-    logger.info("✅  Modelos carregados.")
+    # o app passa a aceitar tráfego imediatamente; fallback, inventário e
+    # códigos respondem enquanto os modelos carregam em segundo plano
+    log_selection_report()
+    logger.info("🔄  Warm-up em segundo plano…")
+    warmup.start(_warmup_steps())
     yield
+    backend.close()
 
 app = FastAPI(
     title="RM Traceability Chat Microservice",
@@ -25,3 +59,8 @@ app = FastAPI(
 )
 
 app.include_router(chat_router, prefix="/chat", tags=["Chat"])
+app.include_router(system_router, prefix="/system", tags=["System"])
+app.include_router(cache_router, prefix="/cache", tags=["Cache"])
+app.include_router(metrics_router, tags=["Metrics"])
+app.include_router(health_router, prefix="/health", tags=["Health"])
+app.add_middleware(RequestContextMiddleware)
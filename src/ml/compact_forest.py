@@ -0,0 +1,136 @@
+"""
+Preditor compacto para o RandomForest de próxima ação.
+
+As árvores viram arrays planos (feature, limiar, filhos e probabilidades
+das folhas) avaliados com NumPy, e uma tabela densa guarda a classe prevista
+para a faixa realista de (n_codes, n_events); fora da tabela o preditor
+percorre as árvores. Carregar e prever não importa scikit-learn.
+
+    python -m src.ml.compact_forest   # exporta model.pkl -> model.npz
+"""
+import os
+from typing import Tuple
+
+import numpy as np
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PKL = os.path.join(ML_DIR, "model.pkl")
+MODEL_NPZ = os.path.join(ML_DIR, "model.npz")
+
+# limites (exclusivos) da tabela: n_codes e n_events por sessão
+TABLE_SHAPE = (128, 128)
+
+
+class CompactForest:
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray,
+                 right: np.ndarray, proba: np.ndarray, roots: np.ndarray, depth: int,
+                 classes: np.ndarray, table: np.ndarray):
+        self.feature = feature        # índice da feature por nó (0 nas folhas)
+        self.threshold = threshold    # limiar por nó
+        self.left = left              # filho esquerdo global, -1 nas folhas
+        self.right = right
+        self.proba = proba            # (nós, classes), normalizado nas folhas
+        self.roots = roots            # nó raiz de cada árvore
+        self.depth = depth
+        self.classes = classes
+        self.table = table            # (n_codes, n_events) -> índice da classe
+
+    @classmethod
+    def from_sklearn(cls, model, table_shape: Tuple[int, int] = TABLE_SHAPE) -> "CompactForest":
+        feature, threshold, left, right, proba, roots = [], [], [], [], [], []
+        offset, depth = 0, 0
+        for est in model.estimators_:
+            tree = est.tree_
+            leaf = tree.children_left == -1
+            value = tree.value[:, 0, :].astype(np.float64)
+            sums = value.sum(axis=1, keepdims=True)
+            roots.append(offset)
+            feature.append(np.where(leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            left.append(np.where(leaf, -1, tree.children_left + offset))
+            right.append(np.where(leaf, -1, tree.children_right + offset))
+            proba.append(value / np.where(sums == 0, 1.0, sums))
+            offset += tree.node_count
+            depth = max(depth, tree.max_depth)
+
+        forest = cls(
+            feature=np.concatenate(feature).astype(np.int8),
+            threshold=np.concatenate(threshold).astype(np.float64),
+            left=np.concatenate(left).astype(np.int32),
+            right=np.concatenate(right).astype(np.int32),
+            proba=np.concatenate(proba).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.int32),
+            depth=int(depth),
+            classes=np.asarray(model.classes_).astype(str),
+            table=np.zeros(0, dtype=np.uint8),
+        )
+        codes, events = np.meshgrid(np.arange(table_shape[0]), np.arange(table_shape[1]), indexing="ij")
+        grid = np.stack([codes.ravel(), events.ravel()], axis=1)
+        forest.table = forest._predict_index(grid).astype(np.uint8).reshape(table_shape)
+        return forest
+
+    def _predict_index(self, X: np.ndarray) -> np.ndarray:
+        """
+        Avalia todas as árvores para as amostras de `X` (n, 2) de uma vez,
+        descendo um nível por iteração.
+        """
+        # o sklearn compara as features em float32
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        idx = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        rows = np.arange(len(X))[:, None]
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[idx]] <= self.threshold[idx]
+            nxt = np.where(go_left, self.left[idx], self.right[idx])
+            idx = np.where(nxt == -1, idx, nxt)
+        return self.proba[idx].sum(axis=1).argmax(axis=1)
+
+    def predict(self, n_codes: int, n_events: int) -> str:
+        if 0 <= n_codes < self.table.shape[0] and 0 <= n_events < self.table.shape[1]:
+            return str(self.classes[self.table[n_codes, n_events]])
+        return str(self.classes[self._predict_index([[n_codes, n_events]])[0]])
+
+    def save(self, path: str = MODEL_NPZ) -> None:
+        np.savez_compressed(
+            path,
+            feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+            proba=self.proba, roots=self.roots, depth=np.int32(self.depth),
+            classes=self.classes, table=self.table,
+        )
+
+    @classmethod
+    def load(cls, path: str = MODEL_NPZ) -> "CompactForest":
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {k: data[k] for k in data.files}
+        arrays["depth"] = int(arrays["depth"])
+        return cls(**arrays)
+
+
+def export(model, path: str = MODEL_NPZ) -> CompactForest:
+    """
+    Exporta `model` e confere, na tabela e fora dela, que o preditor
+    compacto concorda com o scikit-learn.
+    """
+    forest = CompactForest.from_sklearn(model)
+    rows, cols = forest.table.shape
+    probe = np.array(
+        [(c, e) for c in range(rows) for e in range(cols)]
+        + [(c, e) for c in (rows, rows * 4, 10**6) for e in (0, 3, cols * 2, 10**6)],
+        dtype=np.float64,
+    )
+    expected = np.asarray(model.predict(probe)).astype(str)
+    got = forest.classes[forest._predict_index(probe)]
+    mismatches = int((expected != got).sum())
+    if mismatches:
+        raise ValueError(f"Preditor compacto diverge do scikit-learn em {mismatches} pontos")
+    forest.save(path)
+    return forest
+
+
+if __name__ == "__main__":
+    import warnings
+    import joblib
+
+    warnings.filterwarnings("ignore", category=UserWarning)
+    forest = export(joblib.load(MODEL_PKL))
+    print(f"Preditor compacto salvo em {MODEL_NPZ}: {len(forest.left)} nós, "
+          f"tabela {forest.table.shape}, {os.path.getsize(MODEL_NPZ)} bytes")
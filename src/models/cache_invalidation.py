@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+from typing import Optional
+
+class CacheInvalidation(BaseModel):
+    company_id: Optional[str] = None
+    resource_name: Optional[str] = None
+    user_id: Optional[str] = None
@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+from typing import List
+
+from src.models.chat_request import ChatRequest
+
+class ChatBatchRequest(BaseModel):
+    messages: List[ChatRequest]
@@ -0,0 +1,113 @@
+import os
+import logging
+from threading import Lock
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from src.utils.context_loader import context_fingerprint
+from src.utils.text_vectors import hashed_vector, normalize_question
+
+logger = logging.getLogger("answer_cache")
+logger.setLevel(logging.DEBUG)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    logger.addHandler(handler)
+
+ANSWER_CACHE_SIZE       = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+ANSWER_CACHE_SIMILARITY = os.getenv("ANSWER_CACHE_SIMILARITY", "0") == "1"
+ANSWER_CACHE_THRESHOLD  = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.9"))
+VECTOR_DIM = 2048
+
+
+class AnswerCache:
+    """
+    Cache LRU de respostas do LLM indexado pela pergunta normalizada, com
+    busca opcional por similaridade (cosseno sobre n-gramas de caracteres).
+    É esvaziado quando o contexto estático (system_context/SERVICE_INFO) muda.
+    """
+    def __init__(self, maxsize: int = ANSWER_CACHE_SIZE, similarity: bool = ANSWER_CACHE_SIMILARITY,
+                 threshold: float = ANSWER_CACHE_THRESHOLD):
+        self.maxsize = maxsize
+        self.similarity = similarity
+        self.threshold = threshold
+        self._lock = Lock()
+        self._entries: "OrderedDict[str, tuple[int, str]]" = OrderedDict()  # chave -> (linha, resposta)
+        self._vectors = np.zeros((maxsize, VECTOR_DIM), dtype=np.float32) if similarity else None
+        self._keys: list = [None] * maxsize  # linha -> chave
+        self._free = list(range(maxsize - 1, -1, -1))
+        self._fingerprint = ""
+        self.hits = self.similar_hits = self.misses = 0
+
+    def _check_fingerprint(self) -> None:
+        fingerprint = context_fingerprint()
+        if fingerprint != self._fingerprint:
+            if self._entries:
+                logger.info("Contexto mudou, esvaziando cache de respostas (%d)", len(self._entries))
+            self._entries.clear()
+            self._keys = [None] * self.maxsize
+            self._free = list(range(self.maxsize - 1, -1, -1))
+            if self._vectors is not None:
+                self._vectors[:] = 0.0
+            self._fingerprint = fingerprint
+
+    def get(self, question: str) -> Optional[str]:
+        key = normalize_question(question)
+        with self._lock:
+            self._check_fingerprint()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if self._vectors is not None and self._entries:
+                # linhas livres estão zeradas e pontuam 0
+                scores = self._vectors @ hashed_vector(key, VECTOR_DIM)
+                row = int(np.argmax(scores))
+                if scores[row] >= self.threshold:
+                    near = self._keys[row]
+                    self._entries.move_to_end(near)
+                    self.similar_hits += 1
+                    logger.debug("Similar (%.3f): '%s' ~ '%s'", scores[row], key, near)
+                    return self._entries[near][1]
+            self.misses += 1
+            return None
+
+    def put(self, question: str, reply: str) -> None:
+        # só respostas que passaram na validação (rota /dashboard)
+        if "/dashboard" not in reply:
+            return
+        key = normalize_question(question)
+        if not key:
+            return
+        with self._lock:
+            self._check_fingerprint()
+            if key in self._entries:
+                row = self._entries[key][0]
+                self._entries.move_to_end(key)
+            else:
+                if not self._free:
+                    _, (row, _) = self._entries.popitem(last=False)
+                    self._keys[row] = None
+                    self._free.append(row)
+                row = self._free.pop()
+            self._entries[key] = (row, reply)
+            self._keys[row] = key
+            if self._vectors is not None:
+                self._vectors[row] = hashed_vector(key, VECTOR_DIM)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "similarity": self.similarity,
+                "hits": self.hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+            }
+
+
+answer_cache = AnswerCache()
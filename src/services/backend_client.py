@@ -0,0 +1,237 @@
+import os
+import time
+import logging
+import contextvars
+import importlib.util
+from collections import deque
+from contextlib import contextmanager
+from threading import Lock
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Iterator, Optional
+
+import httpx
+
+from src.utils import deadline
+from src.utils.circuit_breaker import CircuitBreaker, CircuitOpen
+from src.utils.metrics import REGISTRY, BACKEND_REQUESTS, BACKEND_SECONDS, BACKEND_HEDGES
+
+logger = logging.getLogger("BackendClient")
+logger.setLevel(logging.DEBUG)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(
+        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    ))
+    logger.addHandler(handler)
+
+MAX_CONNECTIONS = int(os.getenv("BACKEND_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE   = int(os.getenv("BACKEND_MAX_KEEPALIVE", "10"))
+KEEPALIVE_EXPIRY = float(os.getenv("BACKEND_KEEPALIVE_EXPIRY", "30"))
+TIMEOUT         = float(os.getenv("BACKEND_TIMEOUT", "5"))
+# HTTP/2 só é negociado se o pacote `h2` estiver instalado (httpx[http2])
+HTTP2 = importlib.util.find_spec("h2") is not None
+# GETs são idempotentes: com BACKEND_HEDGE=1, uma segunda tentativa sai
+# quando a primeira passa do p95 recente do endpoint
+HEDGE             = os.getenv("BACKEND_HEDGE", "0") == "1"
+HEDGE_MIN_SAMPLES = int(os.getenv("BACKEND_HEDGE_MIN_SAMPLES", "20"))
+HEDGE_WINDOW      = 200
+
+
+def _endpoint(path: str) -> str:
+    # ids no fim do caminho (full-data/{user}) não entram na chave
+    return "/".join(path.split("/")[:3])
+
+
+class _LatencyWindow:
+    """
+    Latências das últimas chamadas bem-sucedidas de um endpoint.
+    """
+    def __init__(self, size: int = HEDGE_WINDOW):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._lock = Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+
+class BackendClient:
+    """
+    Cliente HTTP do backend com pool de conexões keep-alive compartilhado
+    entre as threads dos pools e do fan-out.
+    """
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        transport: Optional[httpx.BaseTransport] = None,
+    ):
+        self._base_url = base_url
+        self._transport = transport
+        self._lock = Lock()
+        self._client: Optional[httpx.Client] = None
+        self._fanout = ThreadPoolExecutor(max_workers=MAX_CONNECTIONS, thread_name_prefix="backend")
+        # tentativas com hedge não disputam threads com o fan-out que as chama
+        self._hedge_pool = ThreadPoolExecutor(max_workers=MAX_CONNECTIONS, thread_name_prefix="backend-hedge")
+        self.hedge = HEDGE
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latency: Dict[str, _LatencyWindow] = {}
+
+    @property
+    def base_url(self) -> str:
+        return self._base_url or os.getenv("BACKEND_URL", "http://rm_traceability_app:3001")
+
+    def _options(self) -> dict:
+        return dict(
+            base_url=self.base_url,
+            timeout=TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+            http2=HTTP2,
+        )
+
+    @property
+    def client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(transport=self._transport, **self._options())
+            return self._client
+
+    def close(self) -> None:
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            client.close()
+
+    def breaker(self, path: str) -> CircuitBreaker:
+        endpoint = _endpoint(path)
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker(endpoint)
+                self._latency[endpoint] = _LatencyWindow()
+            return self._breakers[endpoint]
+
+    def hedge_delay(self, path: str) -> Optional[float]:
+        if not self.hedge:
+            return None
+        self.breaker(path)
+        return self._latency[_endpoint(path)].p95()
+
+    def stats(self) -> Dict[str, dict]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {
+            endpoint: {**b.stats(), "p95": self._latency[endpoint].p95()}
+            for endpoint, b in breakers.items()
+        }
+
+    @contextmanager
+    def _metered(self, path: str, timeout: float) -> Iterator[None]:
+        """
+        Mede a chamada e informa o disjuntor do endpoint: timeouts, falhas
+        de conexão e 5xx contam como falha; 4xx não (o endpoint respondeu).
+        Um timeout encurtado pelo prazo da requisição não conta.
+        """
+        endpoint = _endpoint(path)
+        breaker = self.breaker(path)
+        outcome, start = "ok", time.perf_counter()
+        try:
+            yield
+        except httpx.TimeoutException:
+            outcome = "timeout"
+            if timeout < TIMEOUT:
+                breaker.release()
+            else:
+                breaker.failure()
+            raise
+        except httpx.HTTPStatusError as exc:
+            outcome = "error"
+            if exc.response.status_code >= 500:
+                breaker.failure()
+            else:
+                breaker.success()
+            raise
+        except Exception:
+            outcome = "error"
+            breaker.failure()
+            raise
+        else:
+            breaker.success()
+            self._latency[endpoint].add(time.perf_counter() - start)
+        finally:
+            BACKEND_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+            BACKEND_REQUESTS.inc(endpoint=endpoint, outcome=outcome)
+
+    def _admit(self, path: str) -> float:
+        """
+        Timeout da próxima tentativa; falha na hora se o prazo acabou ou o
+        circuito do endpoint está aberto.
+        """
+        endpoint = _endpoint(path)
+        try:
+            timeout = deadline.timeout(TIMEOUT)
+            self.breaker(path).allow()
+        except deadline.DeadlineExceeded:
+            BACKEND_REQUESTS.inc(endpoint=endpoint, outcome="deadline")
+            raise
+        except CircuitOpen:
+            BACKEND_REQUESTS.inc(endpoint=endpoint, outcome="open")
+            raise
+        return timeout
+
+    def _attempt(self, path: str, params: Optional[dict]) -> Any:
+        timeout = self._admit(path)
+        with self._metered(path, timeout):
+            resp = self.client.get(path, params=params, timeout=timeout)
+            resp.raise_for_status()
+            return resp.json()
+
+    def get_json(self, path: str, params: Optional[dict] = None) -> Any:
+        delay = self.hedge_delay(path)
+        if delay is None:
+            return self._attempt(path, params)
+
+        attempts = [self._hedge_pool.submit(contextvars.copy_context().run, self._attempt, path, params)]
+        done, _ = wait(attempts, timeout=delay)
+        if not done:
+            BACKEND_HEDGES.inc(endpoint=_endpoint(path))
+            attempts.append(self._hedge_pool.submit(contextvars.copy_context().run, self._attempt, path, params))
+        # vale a primeira resposta boa; a outra tentativa termina sozinha
+        pending, error = set(attempts), None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut.exception() is None:
+                    return fut.result()
+                error = error or fut.exception()
+        raise error
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Dispara `fn` em paralelo (threads dedicadas ao fan-out do backend).
+        """
+        return self._fanout.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+backend = BackendClient()
+
+
+_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+def _breaker_samples():
+    for endpoint, stats in backend.stats().items():
+        yield "", {"endpoint": endpoint}, _STATES[stats["state"]]
+
+REGISTRY.collector(
+    "chat_backend_circuit_state", "gauge",
+    "Disjuntor por endpoint do backend (0 fechado, 1 meio-aberto, 2 aberto).", _breaker_samples,
+)
@@ -0,0 +1,123 @@
+import os
+import time
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+
+from src.services.chat_service  import ChatService
+from src.services.intent_router import route
+from src.utils.worker_pool      import PoolSaturated
+
+logger = logging.getLogger("batch_service")
+logger.setLevel(logging.DEBUG)
+if not logger.handlers:
+    sh = logging.StreamHandler()
+    sh.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    logger.addHandler(sh)
+
+BATCH_MAX_ITEMS       = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+BATCH_IO_CONCURRENCY  = int(os.getenv("BATCH_IO_CONCURRENCY", "8"))
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", os.getenv("LLM_WORKERS", "1")))
+BATCH_RETRIES         = int(os.getenv("BATCH_RETRIES", "3"))
+
+# executores próprios: o lote não disputa slots do io_pool com o tráfego
+# interativo, e o grupo LLM nunca enfileira mais que BATCH_LLM_CONCURRENCY
+# gerações no llm_pool
+_io_executor  = ThreadPoolExecutor(max_workers=BATCH_IO_CONCURRENCY, thread_name_prefix="batch-io")
+_llm_executor = ThreadPoolExecutor(max_workers=BATCH_LLM_CONCURRENCY, thread_name_prefix="batch-llm")
+
+
+class BatchService:
+    @staticmethod
+    def _chains(items: List[Dict]) -> tuple[List[List[int]], List[int]]:
+        """
+        Agrupa os itens em cadeias executadas em ordem: itens da mesma sessão
+        formam uma cadeia (o histórico importa); sem sessão, mensagens
+        idênticas são deduplicadas. Retorna (cadeias, índice do item que
+        responde por cada entrada).
+        """
+        chains: List[List[int]] = []
+        by_key: Dict[tuple, int] = {}      # chave -> índice do item original
+        by_session: Dict[str, int] = {}    # session_id -> índice da cadeia
+        owner = list(range(len(items)))
+        for i, item in enumerate(items):
+            session_id = item.get("session_id")
+            if session_id:
+                if session_id not in by_session:
+                    by_session[session_id] = len(chains)
+                    chains.append([])
+                chains[by_session[session_id]].append(i)
+                continue
+            key = (item["message"].strip(), item.get("user_id"), item.get("company_id"))
+            if key in by_key:
+                owner[i] = by_key[key]
+                continue
+            by_key[key] = i
+            chains.append([i])
+        return chains, owner
+
+    @staticmethod
+    def _needs_llm(item: Dict) -> bool:
+        has_company = bool(item.get("company_id") or item.get("user_id"))
+        return route(item["message"]).path(has_company) == "llm"
+
+    @staticmethod
+    def _answer(item: Dict) -> Dict:
+        message = item["message"].strip()
+        if not message:
+            return {"error": "Mensagem vazia.", "status": 400}
+        for attempt in range(BATCH_RETRIES + 1):
+            try:
+                reply, session_id = ChatService.generate_response(
+                    user_message=message,
+                    session_id=item.get("session_id"),
+                    user_id=item.get("user_id"),
+                    company_id=item.get("company_id"),
+                )
+                return {"response": reply, "session_id": session_id}
+            except PoolSaturated as exc:
+                # tráfego interativo ocupando o modelo: espera e tenta de novo
+                if attempt == BATCH_RETRIES:
+                    return {"error": str(exc), "status": 503}
+                time.sleep(exc.retry_after)
+            except HTTPException as exc:
+                return {"error": exc.detail, "status": exc.status_code}
+            except Exception as exc:
+                logger.exception("Falha no item do lote")
+                return {"error": str(exc), "status": 500}
+
+    @classmethod
+    def _run_chain(cls, items: List[Dict], chain: List[int], results: List[Optional[Dict]]) -> None:
+        for i in chain:
+            results[i] = cls._answer(items[i])
+
+    @classmethod
+    def run(cls, items: List[Dict]) -> List[Dict]:
+        """
+        Responde um lote de mensagens ({message, session_id, user_id,
+        company_id}) mantendo a ordem de entrada. Cadeias que não passam pelo
+        LLM (fallback, inventário, códigos) correm em paralelo no executor de
+        I/O; as demais dividem BATCH_LLM_CONCURRENCY threads.
+        """
+        chains, owner = cls._chains(items)
+        results: List[Optional[Dict]] = [None] * len(items)
+        futures = []
+        n_llm = 0
+        for chain in chains:
+            if any(cls._needs_llm(items[i]) for i in chain):
+                executor = _llm_executor
+                n_llm += 1
+            else:
+                executor = _io_executor
+            futures.append(executor.submit(contextvars.copy_context().run, cls._run_chain, items, chain, results))
+        for fut in futures:
+            fut.result()
+
+        logger.info(
+            f"Lote: {len(items)} itens, {len(chains)} cadeias ({n_llm} via LLM), "
+            f"{len(items) - sum(map(len, chains))} duplicados"
+        )
+        return [dict(results[owner[i]]) for i in range(len(items))]
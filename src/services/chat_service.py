@@ -2,15 +2,27 @@ import os
 import re
 import uuid
 import logging
-import unicodedata
-from typing import Optional, Dict
+import threading
+from typing import Iterator, Optional, Dict
 from fastapi import HTTPException
 
 from src.services.ml_service     import MLService
-from src.utils.context_loader    import load_system_context
-from src.utils.product_extractor import extract_product, _strip_accents
+from src.services.backend_client import backend
+from src.services.session_store  import Session, SessionStore, create_session_store
+from src.services.answer_cache   import answer_cache
+from src.services.warmup         import warmup
+from src.services.retrieval      import retriever, llm_enabled, CHAT_MODE, RETRIEVAL_MIN_SCORE
+from src.services.prompt_builder import prompt_builder, PROMPT_COMPACT
+from src.utils.context_loader    import context_fingerprint
+from src.utils.prefix_cache      import prefix_cache
+from src.utils.product_extractor import extract_product_with_llm
+from src.services.intent_router  import route
 from src.utils.llm               import get_model
-from src.config.constants        import SERVICE_INFO, EXAMPLES
+from src.inference.client        import inference
+from src.utils                   import model_registry
+from src.utils.worker_pool       import llm_pool, PoolSaturated, RETRY_AFTER
+from src.utils.metrics           import stage, EXTRACTOR_TOTAL, PATH_TOTAL
+from src.utils.deadline          import budget
 
 logger = logging.getLogger("chat_service")
 logger.setLevel(logging.DEBUG)
@@ -19,13 +31,17 @@ if not logger.handlers:
     sh.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
     logger.addHandler(sh)
 
-SESSIONS: Dict[str, Dict] = {}
+SESSIONS: SessionStore = create_session_store()
 MODEL_FILE = os.getenv("MODEL_FILE", "/app/model/model.gguf")
 
-def _chatml(system: str, user: str) -> str:
+def _chatml_system(system: str) -> str:
     return (
         "<|begin_of_text|><|start_header_id|>system\n"
         f"{system}\n<|end_header_id|>\n\n"
+    )
+
+def _chatml_user(user: str) -> str:
+    return (
         "<|start_header_id|>user\n"
         f"{user}\n<|end_header_id|>\n\n"
         "<|start_header_id|>assistant\n"
@@ -37,108 +53,356 @@ class ChatService:
         "(inventário, códigos, empresas…); 😉"
     )
 
-    DOMAIN_INTENTS = [
-        r"\b(quantos?|qtd|tem|tenho|possui|mostrar|ver)\b",
-        r"\bcodig\w*\b",
-        r"\binvent(?:ario|ario)\b",
-        r"\bempresas?\b",
-        r"\bmovimenta(?:coes|coes|cao)\b",
-        r"\bprodutos?\b",
-        r"\blotes?\b|\blote\b|\bgerar lote\b",
-        r"\bstatus\b",
-        r"\brastreia(?:mento|r)?\b|\bmapa\b",
-        r"\bconfiguracoes?\b"
-    ]
+    HANDLERS = {
+        "inventory": "_handle_inventory",
+        "codes":     "_handle_codes",
+        "llm":       "_handle_llm",
+    }
+
+    GEN_KWARGS = dict(max_tokens=70, temp=0.1, top_p=0.5, repeat_penalty=1.2)
+
+    _system_prefix: tuple[str, str] = ("", "")  # (fingerprint, prefixo chatml)
 
     @classmethod
-    def generate_response(
+    def system_prefix(cls) -> str:
+        """
+        Prefixo estático (`prompt_builder.full()`: contexto, few-shot e
+        SERVICE_INFO) já no formato chatml; só é remontado quando o
+        fingerprint do contexto muda.
+        """
+        fingerprint = context_fingerprint()
+        if cls._system_prefix[0] != fingerprint:
+            cls._system_prefix = (fingerprint, _chatml_system(prompt_builder.full()))
+            logger.info("Prefixo do sistema (re)construído: %s", fingerprint[:12])
+        return cls._system_prefix[1]
+
+    @classmethod
+    def prefix_for(cls, question: str) -> str:
+        """
+        Prefixo só com o contexto relevante para a pergunta (PROMPT_COMPACT);
+        o completo quando nada se destaca.
+        """
+        if PROMPT_COMPACT and question:
+            system = prompt_builder.build(question)
+            if system is not None:
+                return _chatml_system(system)
+        return cls.system_prefix()
+
+    @classmethod
+    def warm_prefix(cls) -> None:
+        """
+        Avalia o prefixo estático no modelo uma vez (startup).
+        """
+        if inference is not None:
+            inference.wait_ready()
+            inference.prefill(cls.system_prefix())
+            return
+        model = get_model()
+        with model_registry.generation_lock(model):
+            prefix_cache.prefill(model, cls.system_prefix())
+
+    @classmethod
+    def _generate(cls, prompt: str, question: str = "") -> str:
+        with stage("prompt_build"):
+            prefix = cls.prefix_for(question)
+        if inference is not None:
+            return inference.generate(prefix, prompt, **cls.GEN_KWARGS)
+        model = get_model()
+        with model_registry.generation_lock(model):
+            return prefix_cache.generate(model, prefix, prompt, **cls.GEN_KWARGS)
+
+    @classmethod
+    def _generate_stream(cls, prompt: str, question: str = "") -> Iterator[str]:
+        with stage("prompt_build"):
+            prefix = cls.prefix_for(question)
+        if inference is not None:
+            # fechar o gerador fecha o socket e interrompe a geração remota
+            yield from inference.stream("generate", prefix=prefix, suffix=prompt, kwargs=cls.GEN_KWARGS)
+            return
+        stopped = threading.Event()
+        model = get_model()
+        with model_registry.generation_lock(model):
+            tokens = prefix_cache.stream(
+                model,
+                prefix,
+                prompt,
+                callback=lambda _id, _txt: not stopped.is_set(),
+                **cls.GEN_KWARGS
+            )
+            try:
+                for token in tokens:
+                    yield token
+            finally:
+                # interrompe a geração nativa e espera a thread do gpt4all
+                # terminar antes de liberar o modelo para a próxima requisição
+                stopped.set()
+                for _ in tokens:
+                    pass
+
+    @staticmethod
+    def _trim(raw: str) -> str:
+        clean = re.sub(r"<\|.*?\|>", "", raw or "").strip()
+        parts = re.split(r'(?<=[\.!?])\s', clean)
+        return ' '.join(parts[:2]).strip()
+
+    @classmethod
+    def _validate(cls, reply: str) -> str:
+        if (
+            not reply
+            or re.match(r'^(none|nenhum|nao)\b', reply.lower())
+            or "/dashboard" not in reply
+        ):
+            return cls.FALLBACK
+        return reply
+
+    @classmethod
+    def _prepare(
         cls,
         user_message: str,
-        session_id: Optional[str] = None,
-        user_id:     Optional[str] = None,
-        company_id:  Optional[str] = None,
-    ) -> tuple[str, str]:
-
+        session_id: Optional[str],
+        user_id: Optional[str],
+        company_id: Optional[str],
+    ) -> tuple[str, Session, Optional[str], str, str]:
+        """
+        Resolve sessão e rotas baratas (fallback, inventário, códigos).
+        Retorna (session_id, sessão, resposta, prompt, mensagem): se `resposta`
+        vier preenchida o histórico já foi atualizado; senão `prompt` (turno do
+        usuário, a ser gerado após `prefix_for(pergunta)`) deve ir ao LLM e
+        `mensagem` é o turno do usuário a registrar no histórico.
+        """
         if not session_id:
             session_id = str(uuid.uuid4())
-        sess = SESSIONS.setdefault(session_id, {"history": [], "last_product": None})
-        hist = sess["history"]
-        lower = _strip_accents(user_message)
 
-        if not any(re.search(p, lower) for p in cls.DOMAIN_INTENTS):
-            hist += [f"Usuário: {user_message}", f"Assistente: {cls.FALLBACK}"]
-            return cls.FALLBACK, session_id
+        # todas as consultas ao backend desta mensagem dividem um prazo
+        with budget():
+            # a empresa do usuário é resolvida em paralelo com sessão e
+            # roteamento; fora do domínio o resultado só aquece o cache
+            company_lookup = None
+            if not company_id and user_id:
+                company_lookup = backend.submit(MLService.get_company_id_for_user, user_id)
+
+            with stage("session"):
+                sess = SESSIONS.get(session_id)
+            with stage("route"):
+                intent = route(user_message)
+
+            if not intent.in_domain:
+                PATH_TOTAL.inc(path="fallback")
+                cls._record(sess, user_message, cls.FALLBACK)
+                return session_id, sess, cls.FALLBACK, "", user_message
 
-        if not company_id and user_id:
-            company_id = MLService.get_company_id_for_user(user_id)
+            if company_lookup is not None:
+                company_id = company_lookup.result()
 
-        if company_id and re.search(r"\b(quantos?|qtd|tem|tenho)\b", lower):
-            produto = extract_product(user_message) or sess["last_product"]
-            sess["last_product"] = produto or sess["last_product"]
+            produtos = intent.slots.get("products", [])
+            if produtos:
+                EXTRACTOR_TOTAL.inc(method="regex")
+            elif company_id and (intent.wants_inventory or intent.wants_codes):
+                produtos = cls._extract_products(user_message, company_id)
+
+            handler = getattr(cls, cls.HANDLERS[intent.path(bool(company_id))])
+            reply, prompt, user_message = handler(sess, user_message, company_id, produtos)
+        return session_id, sess, reply, prompt, user_message
+
+    @staticmethod
+    def _extract_products(user_message: str, company_id: str) -> list[str]:
+        """
+        Regex falhou: tenta o catálogo da empresa e só então o LLM.
+        """
+        with stage("extract_catalog"):
+            catalog = MLService.get_catalog(company_id)
+            produtos = catalog.match_all(user_message) if catalog else []
+        if produtos:
+            EXTRACTOR_TOTAL.inc(method="catalog")
+            return produtos
+        produto = ""
+        if llm_enabled() and not warmup.loading:
+            with stage("extract_llm"):
+                produto = extract_product_with_llm(user_message)
+        EXTRACTOR_TOTAL.inc(method="llm" if produto else "none")
+        return [produto] if produto else []
+
+    UNAVAILABLE = "indisponível"
+
+    @staticmethod
+    def _table(header: tuple, rows: list) -> str:
+        """
+        Tabela markdown: uma linha por produto.
+        """
+        lines = ["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+        lines += ["| " + " | ".join(str(cell) for cell in row) + " |" for row in rows]
+        return "\n".join(lines)
+
+    @classmethod
+    def _handle_inventory(cls, sess: Session, user_message: str, company_id: str, produtos: list[str]):
+        if len(produtos) > 1:
+            sess.last_product = produtos[0]
+            amounts = MLService.get_inventory_quantities(produtos, company_id)
+            reply = cls._table(("Produto", "Quantidade"), [
+                (produto, cls.UNAVAILABLE if qtd is None else qtd) for produto, qtd in amounts.items()
+            ])
+        else:
+            produto = (produtos[0] if produtos else "") or sess.last_product
+            sess.last_product = produto or sess.last_product
             reply = MLService.fetch_inventory_for_product(produto, company_id).strip()
-            hist += [f"Usuário: {user_message}", f"Assistente: {reply}"]
-            return reply, session_id
+        PATH_TOTAL.inc(path="inventory")
+        cls._record(sess, user_message, reply)
+        return reply, "", user_message
 
-        if company_id and re.search(r"\b(?:codig\w*|mostrar codig\w*|listar codig\w*|quais codig\w*)\b", lower):
-            produto = extract_product(user_message) or sess["last_product"]
-            sess["last_product"] = produto or sess["last_product"]
+    @classmethod
+    def _handle_codes(cls, sess: Session, user_message: str, company_id: str, produtos: list[str]):
+        if len(produtos) > 1:
+            sess.last_product = produtos[0]
+            found = MLService.fetch_codes_for_products(produtos, company_id)
+            reply = cls._table(("Produto", "Códigos"), [
+                (produto, cls.UNAVAILABLE if codes is None else ", ".join(codes) or "nenhum")
+                for produto, codes in found.items()
+            ])
+        else:
+            produto = (produtos[0] if produtos else "") or sess.last_product
+            sess.last_product = produto or sess.last_product
             codes = MLService.fetch_codes_for_product(produto, company_id)
             if produto and codes:
                 reply = f"Códigos para '{produto}':\n" + "\n".join(codes)
+            elif produto and codes is None:
+                reply = "Não foi possível consultar os códigos agora; tente novamente em instantes."
             elif produto:
                 reply = "Nenhum código encontrado."
             else:
                 reply = "Desculpe, não consegui identificar o produto."
-            hist += [f"Usuário: {user_message}", f"Assistente: {reply}"]
-            return reply, session_id
+        PATH_TOTAL.inc(path="codes")
+        cls._record(sess, user_message, reply)
+        return reply, "", user_message
 
-        service_info_text = "\n".join(f"- {txt}" for txt in SERVICE_INFO.values())
-        system_ctx = (
-            f"{load_system_context()}\n\n"
-            f"{EXAMPLES}\n\n"
-            f"Informações de serviço:\n{service_info_text}\n\n"
-            "⚠️ Responda em **português do Brasil**, de forma concisa e direta, "
-            "preferencialmente em até duas frases, sem repetições."
-        )
-
-        last_prod = sess["last_product"]
-        if last_prod and company_id:
+    @classmethod
+    def _handle_llm(cls, sess: Session, user_message: str, company_id: Optional[str], produtos: list[str]):
+        # enquanto o modelo carrega só a recuperação e o cache respondem
+        warming = llm_enabled() and warmup.loading
+        last_prod = sess.last_product
+        if last_prod and company_id and llm_enabled() and not warming:
             inv = MLService.fetch_inventory_for_product(last_prod, company_id)
             user_message += f"\n{inv}\n[Responda **apenas** com base nesses dados.]"
+            PATH_TOTAL.inc(path="llm")
+            return None, _chatml_user(user_message), user_message
 
-        prompt = _chatml(system_ctx, user_message)
+        if CHAT_MODE != "llm" or warming:
+            with stage("retrieval"):
+                hit = retriever.search(user_message)
+            logger.debug(f"Recuperação: {hit.key} score={hit.score:.2f} margem={hit.margin:.2f}")
+            if hit.confident or not llm_enabled():
+                reply = hit.reply if hit.score >= RETRIEVAL_MIN_SCORE else cls.FALLBACK
+                PATH_TOTAL.inc(path="retrieval")
+                cls._record(sess, user_message, reply)
+                return reply, "", user_message
 
-        try:
-            model = get_model()
-            with model.chat_session() as chat:
-                raw = chat.generate(
-                    prompt=prompt,
-                    max_tokens=70,
-                    temp=0.1,
-                    top_p=0.5,
-                    repeat_penalty=1.2
-                )
-        except Exception as e:
-            logger.exception("LLM failure")
-            raise HTTPException(status_code=500, detail=f"Erro do modelo: {e}")
+        if (cached := answer_cache.get(user_message)) is not None:
+            PATH_TOTAL.inc(path="answer_cache")
+            cls._record(sess, user_message, cached)
+            return cached, "", user_message
+        if warming:
+            raise HTTPException(
+                status_code=503,
+                detail="Modelo carregando, tente novamente em instantes.",
+                headers={"Retry-After": str(RETRY_AFTER)},
+            )
+        PATH_TOTAL.inc(path="llm")
+        return None, _chatml_user(user_message), user_message
 
-        clean = re.sub(r"<\|.*?\|>", "", raw or "").strip()
-        parts = re.split(r'(?<=[\.!?])\s', clean)
-        reply = ' '.join(parts[:2]).strip()
-        if (
-            not reply
-            or re.match(r'^(none|nenhum|nao)\b', reply.lower())
-            or "/dashboard" not in reply
-        ):
-            reply = cls.FALLBACK
+    @staticmethod
+    def _record(sess: Session, user_message: str, reply: str) -> None:
+        sess.add_turn(user_message, reply)
+        with stage("session"):
+            SESSIONS.save(sess)
 
+    @classmethod
+    def _finish(cls, sess: Session, question: str, user_message: str, reply: str) -> None:
+        # respostas com dados de estoque injetados dependem do usuário
+        if user_message == question:
+            answer_cache.put(question, reply)
         try:
-            n_codes  = len(codes) if "codes" in locals() else 0
-            n_events = sum(1 for m in hist if m.startswith("Usuário:"))
+            n_codes  = 0
+            n_events = sess.user_turns()
             next_act = MLService.predict_next_action(n_codes, n_events)
             logger.debug(f"Próxima ação sugerida: {next_act}")
         except Exception:
             logger.debug("Não foi possível predizer próxima ação", exc_info=True)
 
-        hist += [f"Usuário: {user_message}", f"Assistente: {reply}"]
+        cls._record(sess, user_message, reply)
+
+    @classmethod
+    def generate_response(
+        cls,
+        user_message: str,
+        session_id: Optional[str] = None,
+        user_id:     Optional[str] = None,
+        company_id:  Optional[str] = None,
+    ) -> tuple[str, str]:
+
+        session_id, sess, reply, prompt, turn = cls._prepare(user_message, session_id, user_id, company_id)
+        if reply is not None:
+            return reply, session_id
+
+        try:
+            raw = llm_pool.call(cls._generate, prompt, user_message)
+        except PoolSaturated:
+            raise
+        except Exception as e:
+            logger.exception("LLM failure")
+            raise HTTPException(status_code=500, detail=f"Erro do modelo: {e}")
+
+        reply = cls._validate(cls._trim(raw))
+        cls._finish(sess, user_message, turn, reply)
         return reply, session_id
+
+    @classmethod
+    def stream_response(
+        cls,
+        user_message: str,
+        session_id: Optional[str] = None,
+        user_id:     Optional[str] = None,
+        company_id:  Optional[str] = None,
+    ) -> Iterator[tuple[str, Dict]]:
+        """
+        Versão incremental de `generate_response`: produz eventos
+        ("token", {"text": ...}) conforme o LLM gera e termina com
+        ("done", {"response", "session_id", "replaced"}). `replaced` indica
+        que o texto transmitido não passou na validação e foi trocado pelo
+        fallback.
+        """
+        session_id, sess, reply, prompt, turn = cls._prepare(user_message, session_id, user_id, company_id)
+        if reply is not None:
+            yield "token", {"text": reply}
+            yield "done", {"response": reply, "session_id": session_id, "replaced": False}
+            return
+
+        raw, emitted = "", ""
+        try:
+            for token in llm_pool.iterate(cls._generate_stream, prompt, user_message):
+                raw += token
+                # segura um marcador <|...|> ainda incompleto
+                partial = re.sub(r"<\|.*?\|>", "", raw)
+                cut = partial.find("<|")
+                if cut != -1:
+                    partial = partial[:cut]
+                elif partial.endswith("<"):
+                    partial = partial[:-1]
+                visible = cls._trim(partial)
+                if visible.startswith(emitted) and len(visible) > len(emitted):
+                    yield "token", {"text": visible[len(emitted):]}
+                    emitted = visible
+                if len(re.split(r'(?<=[\.!?])\s', partial.strip())) > 2:
+                    break
+        except PoolSaturated:
+            raise
+        except Exception as e:
+            logger.exception("LLM failure")
+            raise HTTPException(status_code=500, detail=f"Erro do modelo: {e}")
+
+        trimmed = cls._trim(raw)
+        reply = cls._validate(trimmed)
+        if reply == trimmed and reply.startswith(emitted) and len(reply) > len(emitted):
+            # o que ficou segurado (ex.: um "<" final que não virou marcador)
+            yield "token", {"text": reply[len(emitted):]}
+            emitted = reply
+        cls._finish(sess, user_message, turn, reply)
+        yield "done", {"response": reply, "session_id": session_id, "replaced": reply != emitted}
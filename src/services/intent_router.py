@@ -0,0 +1,72 @@
+import re
+from typing import Any, Dict, FrozenSet, NamedTuple
+
+from src.utils.product_extractor import _strip_accents, match_products
+
+# Padrões de domínio (aplicados sobre o texto sem acento e em minúsculas).
+DOMAIN_INTENTS = [
+    r"\b(quantos?|qtd|tem|tenho|possui|mostrar|ver)\b",
+    r"\bcodig\w*\b",
+    r"\binvent(?:ario|ario)\b",
+    r"\bempresas?\b",
+    r"\bmovimenta(?:coes|coes|cao)\b",
+    r"\bprodutos?\b",
+    r"\blotes?\b|\blote\b|\bgerar lote\b",
+    r"\bstatus\b",
+    r"\brastreia(?:mento|r)?\b|\bmapa\b",
+    r"\bconfiguracoes?\b"
+]
+
+# Um único matcher com grupos nomeados: `quantity` e `codes` disparam os
+# atalhos de backend, `domain` cobre o restante dos DOMAIN_INTENTS.
+_MATCHER = re.compile(
+    r"(?P<quantity>\b(?:quantos?|qtd|tem|tenho)\b)"
+    r"|(?P<codes>\bcodig\w*\b)"
+    r"|(?P<domain>" + "|".join(f"(?:{p})" for p in DOMAIN_INTENTS) + r")"
+)
+
+
+class Intent(NamedTuple):
+    text: str                  # mensagem normalizada
+    groups: FrozenSet[str]     # grupos do matcher que casaram
+    slots: Dict[str, Any]
+
+    @property
+    def in_domain(self) -> bool:
+        return bool(self.groups)
+
+    @property
+    def wants_inventory(self) -> bool:
+        return "quantity" in self.groups
+
+    @property
+    def wants_codes(self) -> bool:
+        return "codes" in self.groups
+
+    def path(self, has_company: bool) -> str:
+        """
+        Caminho de atendimento: fallback, inventory, codes ou llm.
+        """
+        if not self.in_domain:
+            return "fallback"
+        if has_company and self.wants_inventory:
+            return "inventory"
+        if has_company and self.wants_codes:
+            return "codes"
+        return "llm"
+
+
+def route(user_message: str) -> Intent:
+    """
+    Normaliza a mensagem uma vez e identifica, numa única varredura, os
+    grupos de intenção presentes; os produtos só são extraídos (regex) quando a
+    intenção é de inventário ou códigos.
+    """
+    text = _strip_accents(user_message)
+    groups = frozenset(m.lastgroup for m in _MATCHER.finditer(text))
+    slots = {}
+    if "quantity" in groups or "codes" in groups:
+        products = match_products(text)
+        slots["product"] = products[0] if products else ""
+        slots["products"] = products
+    return Intent(text, groups, slots)
@@ -1,8 +1,16 @@
 import os
-import requests
+import time
 import logging
 from typing import Optional
-from joblib import load
+
+import httpx
+
+from src.ml.compact_forest import CompactForest, MODEL_NPZ, MODEL_PKL
+from src.services.backend_client import backend
+from src.utils.circuit_breaker import CircuitOpen
+from src.utils.deadline import DeadlineExceeded
+from src.utils.ttl_cache import TTLCache
+from src.utils.catalog_index import CatalogIndex
 
 logger = logging.getLogger("MLService")
 logger.setLevel(logging.DEBUG)
@@ -13,31 +21,74 @@ if not logger.handlers:
     ))
     logger.addHandler(handler)
 
+CACHE_MAXSIZE = int(os.getenv("CACHE_MAXSIZE", "10000"))
+# endpoints opcionais (catálogo e lotes; vazio desativa): se o backend
+# responder 404/405/501 o caminho fica desligado por ENDPOINT_RETRY segundos
+CATALOG_PATH        = os.getenv("CATALOG_PATH", "/orchestration/resources")
+INVENTORY_BULK_PATH = os.getenv("INVENTORY_BULK_PATH", "/orchestration/inventory-quantities")
+CODES_BULK_PATH     = os.getenv("CODES_BULK_PATH", "/orchestration/inventory-codes-bulk")
+ENDPOINT_RETRY      = float(os.getenv("ENDPOINT_RETRY", "300"))
+
 class MLService:
     _action_model = None
+    # endpoint opcional -> instante (monotônico) até o qual fica desligado
+    _unsupported: dict[str, float] = {}
+
+    # user→company praticamente não muda; estoque e códigos mudam com movimentações
+    company_cache   = TTLCache("company",   ttl=float(os.getenv("CACHE_COMPANY_TTL", "3600")), maxsize=CACHE_MAXSIZE)
+    inventory_cache = TTLCache("inventory", ttl=float(os.getenv("CACHE_INVENTORY_TTL", "15")), maxsize=CACHE_MAXSIZE)
+    codes_cache     = TTLCache("codes",     ttl=float(os.getenv("CACHE_CODES_TTL", "15")),     maxsize=CACHE_MAXSIZE)
+    # catálogo de produtos por empresa, já indexado para busca aproximada
+    catalog_cache   = TTLCache("catalog",   ttl=float(os.getenv("CACHE_CATALOG_TTL", "300")),  maxsize=CACHE_MAXSIZE)
+
+    @staticmethod
+    def _log_failure(method: str, exc: Exception) -> None:
+        # disjuntor aberto e prazo esgotado são falhas rápidas esperadas
+        if isinstance(exc, (CircuitOpen, DeadlineExceeded)):
+            logger.warning(f"[{method}] {exc}")
+        else:
+            logger.error(f"[{method}] falha", exc_info=exc)
+
+    @staticmethod
+    def _available(path: str) -> bool:
+        return bool(path) and MLService._unsupported.get(path, 0) <= time.monotonic()
+
+    @staticmethod
+    def _mark_unsupported(path: str, exc: Exception) -> bool:
+        """
+        Desliga `path` por ENDPOINT_RETRY se o backend não o implementa.
+        """
+        if isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code in (404, 405, 501):
+            MLService._unsupported[path] = time.monotonic() + ENDPOINT_RETRY
+            logger.info(f"{path} indisponível ({exc.response.status_code}); nova tentativa em {ENDPOINT_RETRY:.0f}s")
+            return True
+        return False
 
     @staticmethod
     def get_company_id_for_user(user_id: str) -> Optional[str]:
-        backend_url = os.getenv("BACKEND_URL", "http://rm_traceability_app:3001")
-        url = f"{backend_url}/orchestration/full-data/{user_id}"
-        logger.debug(f"[get_company_id_for_user] GET {url}")
+        path = f"/orchestration/full-data/{user_id}"
+        logger.debug(f"[get_company_id_for_user] GET {path}")
         try:
-            resp = requests.get(url, timeout=5)
-            resp.raise_for_status()
-            data = resp.json()
+            data = MLService.company_cache.get_or_load(user_id, lambda: backend.get_json(path))
             return data.get("user", {}).get("companyId")
-        except Exception:
-            logger.error("[get_company_id_for_user] falha", exc_info=True)
+        except Exception as exc:
+            MLService._log_failure("get_company_id_for_user", exc)
             return None
 
     @staticmethod
-    def _load_action_model():
+    def load_action_model():
+        """
+        Carrega o preditor compacto (model.npz, só NumPy); sem ele, compila
+        o model.pkl (exige scikit-learn). Chamado no startup.
+        """
         if MLService._action_model is None:
-            model_path = os.path.join(
-                os.path.dirname(__file__), "..", "ml", "model.pkl"
-            )
-            MLService._action_model = load(model_path)
-            logger.info(f"Action model carregado de {model_path}")
+            if os.path.exists(MODEL_NPZ):
+                MLService._action_model = CompactForest.load(MODEL_NPZ)
+                logger.info(f"Action model compacto carregado de {MODEL_NPZ}")
+            else:
+                from joblib import load
+                MLService._action_model = CompactForest.from_sklearn(load(MODEL_PKL))
+                logger.warning(f"{MODEL_NPZ} ausente; compilado a partir de {MODEL_PKL}")
         return MLService._action_model
 
     @staticmethod
@@ -45,44 +96,182 @@ class MLService:
         """
         Prediz a próxima ação com base nos contadores de códigos e eventos.
         """
-        model = MLService._load_action_model()
-        pred = model.predict([[n_codes, n_events]])[0]
+        pred = MLService.load_action_model().predict(n_codes, n_events)
         logger.debug(f"[predict_next_action] features=({n_codes},{n_events}) -> {pred}")
         return pred
 
     @staticmethod
-    def get_inventory_quantity(resource_name: str, company_id: str) -> int:
-        backend = os.getenv("BACKEND_URL", "http://rm_traceability_app:3001")
-        url = (
-            f"{backend}/orchestration/inventory-quantity"
-            f"?companyId={company_id}&resourceName={resource_name}"
-        )
-        logger.debug(f"[get_inventory_quantity] GET {url}")
+    def get_inventory_quantity(resource_name: str, company_id: str) -> Optional[int]:
+        """
+        Quantidade em estoque; None se o backend não respondeu.
+        """
+        params = {"companyId": company_id, "resourceName": resource_name}
+        logger.debug(f"[get_inventory_quantity] GET /orchestration/inventory-quantity {params}")
         try:
-            resp = requests.get(url, timeout=5)
-            resp.raise_for_status()
-            return resp.json().get("amount", 0)
-        except Exception:
-            logger.error("[get_inventory_quantity] falha", exc_info=True)
-            return 0
+            data = MLService.inventory_cache.get_or_load(
+                (company_id, resource_name),
+                lambda: backend.get_json("/orchestration/inventory-quantity", params),
+            )
+            return data.get("amount", 0)
+        except Exception as exc:
+            MLService._log_failure("get_inventory_quantity", exc)
+            return None
 
     @staticmethod
     def fetch_inventory_for_product(resource_name: str, company_id: str) -> str:
         qtd = MLService.get_inventory_quantity(resource_name, company_id)
+        if qtd is None:
+            return f"\n[Resposta do BD: não foi possível consultar o estoque de {resource_name} agora; tente novamente em instantes.]"
         return f"\n[Resposta do BD: Você tem {qtd} unidades de {resource_name} no estoque.]"
 
     @staticmethod
-    def fetch_codes_for_product(resource_name: str, company_id: str) -> list[str]:
-        backend = os.getenv("BACKEND_URL", "http://rm_traceability_app:3001")
-        url = (
-            f"{backend}/orchestration/inventory-codes"
-            f"?companyId={company_id}&resourceName={resource_name}"
+    def fetch_codes_for_product(resource_name: str, company_id: str) -> Optional[list[str]]:
+        """
+        Códigos do produto; None se o backend não respondeu.
+        """
+        params = {"companyId": company_id, "resourceName": resource_name}
+        logger.debug(f"[fetch_codes_for_product] GET /orchestration/inventory-codes {params}")
+        try:
+            data = MLService.codes_cache.get_or_load(
+                (company_id, resource_name),
+                lambda: backend.get_json("/orchestration/inventory-codes", params),
+            )
+            return data.get("codes", [])
+        except Exception as exc:
+            MLService._log_failure("fetch_codes_for_product", exc)
+            return None
+
+    @staticmethod
+    def _bulk(path: str, names: list[str], company_id: str) -> dict[str, dict]:
+        """
+        Uma chamada para vários produtos. Aceita {"items": [{"resourceName",
+        ...}]} ou {nome: {...}}; cada item tem o formato da resposta unitária.
+        """
+        if not MLService._available(path):
+            return {}
+        params = {"companyId": company_id, "resourceNames": ",".join(names)}
+        logger.debug(f"[bulk] GET {path} {params}")
+        try:
+            data = backend.get_json(path, params)
+        except Exception as exc:
+            if not MLService._mark_unsupported(path, exc):
+                MLService._log_failure("bulk", exc)
+            return {}
+        items = data.get("items", data) if isinstance(data, dict) else data
+        if isinstance(items, list):
+            items = {str(item.get("resourceName")): item for item in items if isinstance(item, dict)}
+        return {name: items[name] for name in names if isinstance(items.get(name), dict)}
+
+    @staticmethod
+    def _lookup_many(cache, single_path: str, bulk_path: str, names: list[str], company_id: str) -> dict[str, Optional[dict]]:
+        """
+        Respostas (formato unitário) para vários produtos: cache, depois o
+        endpoint em lote e, para o que faltar, fan-out concorrente das
+        chamadas unitárias. None onde o backend não respondeu.
+        """
+        names = list(dict.fromkeys(names))
+        found, generation = cache.get_many((company_id, name) for name in names)
+        result = {name: found.get((company_id, name)) for name in names}
+        missing = [name for name in names if result[name] is None]
+        if missing:
+            loaded = MLService._bulk(bulk_path, missing, company_id)
+            cache.put_many({(company_id, name): item for name, item in loaded.items()}, generation)
+            result.update(loaded)
+            missing = [name for name in missing if name not in loaded]
+
+        def load(name: str) -> Optional[dict]:
+            params = {"companyId": company_id, "resourceName": name}
+            try:
+                # a falta já foi contada em get_many
+                return cache.get_or_load((company_id, name), lambda: backend.get_json(single_path, params), count=False)
+            except Exception as exc:
+                MLService._log_failure("lookup_many", exc)
+                return None
+
+        futures = {name: backend.submit(load, name) for name in missing}
+        result.update({name: fut.result() for name, fut in futures.items()})
+        return result
+
+    @staticmethod
+    def get_inventory_quantities(names: list[str], company_id: str) -> dict[str, Optional[int]]:
+        """
+        Quantidade de cada produto (None onde o backend não respondeu).
+        """
+        items = MLService._lookup_many(
+            MLService.inventory_cache, "/orchestration/inventory-quantity", INVENTORY_BULK_PATH, names, company_id
+        )
+        return {name: None if item is None else item.get("amount", 0) for name, item in items.items()}
+
+    @staticmethod
+    def fetch_codes_for_products(names: list[str], company_id: str) -> dict[str, Optional[list[str]]]:
+        """
+        Códigos de cada produto (None onde o backend não respondeu).
+        """
+        items = MLService._lookup_many(
+            MLService.codes_cache, "/orchestration/inventory-codes", CODES_BULK_PATH, names, company_id
+        )
+        return {name: None if item is None else item.get("codes", []) for name, item in items.items()}
+
+    @staticmethod
+    def _build_catalog(data) -> CatalogIndex:
+        items = data.get("resources", data.get("products", [])) if isinstance(data, dict) else data
+        return CatalogIndex(
+            item.get("name", "") if isinstance(item, dict) else item
+            for item in items or []
         )
-        logger.debug(f"[fetch_codes_for_product] GET {url}")
+
+    @staticmethod
+    def get_catalog(company_id: str) -> Optional[CatalogIndex]:
+        """
+        Índice dos produtos da empresa (GET CATALOG_PATH); None se falhar
+        ou se o backend não tiver o endpoint.
+        """
+        if not MLService._available(CATALOG_PATH):
+            return None
+        params = {"companyId": company_id}
+        logger.debug(f"[get_catalog] GET {CATALOG_PATH} {params}")
         try:
-            resp = requests.get(url, timeout=5)
-            resp.raise_for_status()
-            return resp.json().get("codes", [])
-        except Exception:
-            logger.error("[fetch_codes_for_product] falha", exc_info=True)
-            return []
+            return MLService.catalog_cache.get_or_load(
+                company_id,
+                lambda: MLService._build_catalog(backend.get_json(CATALOG_PATH, params)),
+            )
+        except Exception as exc:
+            if not MLService._mark_unsupported(CATALOG_PATH, exc):
+                MLService._log_failure("get_catalog", exc)
+            return None
+
+    @staticmethod
+    def invalidate_cache(
+        company_id: Optional[str] = None,
+        resource_name: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> dict:
+        """
+        Invalida entradas de cache após movimentações no backend. Sem
+        argumentos, esvazia todos os caches.
+        """
+        if not (company_id or resource_name or user_id):
+            removed = {c.name: c.invalidate() for c in MLService._caches()}
+        else:
+            def match(key) -> bool:
+                return (
+                    (company_id is None or key[0] == company_id)
+                    and (resource_name is None or key[1] == resource_name)
+                )
+            removed = {
+                "company": MLService.company_cache.invalidate(lambda k: k == user_id) if user_id else 0,
+                "inventory": MLService.inventory_cache.invalidate(match) if company_id or resource_name else 0,
+                "codes": MLService.codes_cache.invalidate(match) if company_id or resource_name else 0,
+                # produto novo/renomeado: o catálogo da empresa é recarregado
+                "catalog": MLService.catalog_cache.invalidate(lambda k: k == company_id) if company_id else 0,
+            }
+        logger.info(f"[invalidate_cache] company={company_id} resource={resource_name} user={user_id} -> {removed}")
+        return removed
+
+    @staticmethod
+    def _caches() -> tuple:
+        return (MLService.company_cache, MLService.inventory_cache, MLService.codes_cache, MLService.catalog_cache)
+
+    @staticmethod
+    def cache_stats() -> dict:
+        return {c.name: c.stats() for c in MLService._caches()}
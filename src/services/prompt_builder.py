@@ -0,0 +1,176 @@
+import os
+import re
+import logging
+from threading import Lock
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.config.constants import SERVICE_INFO, EXAMPLES
+from src.utils.context_loader import context_fingerprint, load_system_context
+from src.utils.text_vectors import TfidfIndex
+from src.utils.prefix_cache import prefix_cache
+
+logger = logging.getLogger("prompt_builder")
+logger.setLevel(logging.DEBUG)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    logger.addHandler(handler)
+
+# desligado por padrão: o prefix_cache guarda um único prefixo por modelo e
+# cada troca de intenção refaria o prefill que o prompt completo reaproveita
+PROMPT_COMPACT      = os.getenv("PROMPT_COMPACT", "0") == "1"
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "350"))
+PROMPT_TOP_K        = int(os.getenv("PROMPT_TOP_K", "3"))
+PROMPT_MIN_SCORE    = float(os.getenv("PROMPT_MIN_SCORE", "0.2"))
+# o gpt4all não expõe o tokenizador: a razão caracteres/token começa nesta
+# estimativa e é calibrada com as contagens reais de cada prefill
+PROMPT_CHARS_PER_TOKEN = float(os.getenv("PROMPT_CHARS_PER_TOKEN", "3.5"))
+
+INSTRUCTION = (
+    "⚠️ Responda em **português do Brasil**, de forma concisa e direta, "
+    "preferencialmente em até duas frases, sem repetições."
+)
+
+
+class TokenCounter:
+    def __init__(self, chars_per_token: float = PROMPT_CHARS_PER_TOKEN):
+        self.chars_per_token = chars_per_token
+        self.calibrated = False
+
+    def count(self, text: str) -> int:
+        return int(len(text) / self.chars_per_token) + 1
+
+    def observe(self, text: str, tokens: int) -> None:
+        """
+        Recebe a contagem exata do modelo para `text` (n_past após o prefill).
+        """
+        if tokens <= 0:
+            return
+        ratio = len(text) / tokens
+        self.chars_per_token = ratio if not self.calibrated else 0.8 * self.chars_per_token + 0.2 * ratio
+        self.calibrated = True
+
+
+class PromptBuilder:
+    """
+    Monta o prompt de sistema só com o que é relevante para a pergunta:
+    linhas de funcionalidade do system_context, few-shots de EXAMPLES e
+    entradas de SERVICE_INFO são pontuadas (TF-IDF) contra a pergunta
+    normalizada e entram por relevância, até PROMPT_TOP_K de cada tipo e
+    dentro de PROMPT_TOKEN_BUDGET. Cada seleção (a "intenção") tem seu
+    prompt montado uma única vez.
+    """
+    def __init__(self, budget: int = PROMPT_TOKEN_BUDGET, top_k: int = PROMPT_TOP_K,
+                 min_score: float = PROMPT_MIN_SCORE, counter: Optional[TokenCounter] = None,
+                 maxsize: int = 128):
+        self.budget = budget
+        self.top_k = top_k
+        self.min_score = min_score
+        self.counter = counter or TokenCounter()
+        self.maxsize = maxsize
+        self._lock = Lock()
+        self._fingerprint = ""
+        self._state: Optional[tuple] = None
+        self._prompts: "OrderedDict[Tuple[int, ...], str]" = OrderedDict()
+
+    def _build_state(self) -> tuple:
+        head, bullets = [], []
+        for line in load_system_context().splitlines():
+            (bullets if line.lstrip().startswith("- ") else head).append(line)
+        examples = [b.strip() for b in EXAMPLES.strip().split("\n\n") if b.strip()]
+        service = [f"- {txt}" for txt in SERVICE_INFO.values()]
+
+        # (tipo, texto) de cada candidato; o índice indexa a pergunta do
+        # few-shot (não a resposta) e o texto das demais
+        candidates = [("context", b) for b in bullets] + [("example", e) for e in examples] \
+            + [("service", s) for s in service]
+        docs = [re.sub(r"\nAssistente:.*", "", text, flags=re.S) for _, text in candidates]
+        head_text = "\n".join(head).strip()
+        # o completo mantém o layout original: é o mesmo texto que o
+        # ChatService pré-avalia no startup
+        full = (
+            f"{load_system_context()}\n\n"
+            f"{EXAMPLES}\n\n"
+            "Informações de serviço:\n" + "\n".join(service) + "\n\n"
+            f"{INSTRUCTION}"
+        )
+        logger.info("Prompt completo: ~%d tokens", self.counter.count(full))
+        return TfidfIndex(docs), candidates, head_text, full
+
+    @staticmethod
+    def _assemble(head: str, candidates: List[tuple], chosen) -> str:
+        parts = {"context": [], "example": [], "service": []}
+        for i in sorted(chosen):
+            kind, text = candidates[i]
+            parts[kind].append(text)
+        sections = [head + ("\n" + "\n".join(parts["context"]) if parts["context"] else "")]
+        if parts["example"]:
+            sections.append("\n\n".join(parts["example"]))
+        if parts["service"]:
+            sections.append("Informações de serviço:\n" + "\n".join(parts["service"]))
+        sections.append(INSTRUCTION)
+        return "\n\n".join(sections)
+
+    def _ensure_state(self) -> tuple:
+        fingerprint = context_fingerprint()
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                self._state = self._build_state()
+                self._prompts.clear()
+                self._fingerprint = fingerprint
+            return self._state
+
+    def _select(self, question: str) -> Tuple[int, ...]:
+        index, candidates, head, _ = self._ensure_state()
+        scores = index.scores(question)
+        used = self.counter.count(head) + self.counter.count(INSTRUCTION)
+        taken = {"context": 0, "example": 0, "service": 0}
+        chosen = []
+        for i in np.argsort(-scores, kind="stable"):
+            if scores[i] < self.min_score:
+                break
+            kind, text = candidates[i]
+            cost = self.counter.count(text)
+            if taken[kind] >= self.top_k or used + cost > self.budget:
+                continue
+            taken[kind] += 1
+            used += cost
+            chosen.append(int(i))
+        return tuple(sorted(chosen))
+
+    def build(self, question: str) -> Optional[str]:
+        """
+        Texto do prompt de sistema compacto para `question`, ou None quando
+        nada é relevante o bastante (usar o prompt completo).
+        """
+        chosen = self._select(question)
+        if not chosen:
+            return None
+        with self._lock:
+            prompt = self._prompts.get(chosen)
+            if prompt is not None:
+                self._prompts.move_to_end(chosen)
+                return prompt
+        _, candidates, head, full = self._ensure_state()
+        prompt = self._assemble(head, candidates, chosen)
+        logger.info(
+            "Prompt compactado %s: ~%d -> ~%d tokens",
+            [candidates[i][0][0] + str(i) for i in chosen],
+            self.counter.count(full), self.counter.count(prompt),
+        )
+        with self._lock:
+            self._prompts[chosen] = prompt
+            if len(self._prompts) > self.maxsize:
+                self._prompts.popitem(last=False)
+        return prompt
+
+    def full(self) -> str:
+        return self._ensure_state()[3]
+
+
+prompt_builder = PromptBuilder()
+# calibra a estimativa com a contagem real de cada prefill
+prefix_cache.on_prefill(prompt_builder.counter.observe)
@@ -0,0 +1,138 @@
+import os
+import re
+import logging
+from threading import Lock
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+
+from src.config.constants import SERVICE_INFO, EXAMPLES
+from src.utils.context_loader import context_fingerprint, load_system_context
+from src.utils.text_vectors import TfidfIndex
+
+logger = logging.getLogger("retrieval")
+logger.setLevel(logging.DEBUG)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    logger.addHandler(handler)
+
+# hybrid: responde por recuperação quando confiante e usa o LLM no resto
+# retrieval: nunca usa o LLM (nós sem memória para o modelo)
+# llm: comportamento original, sempre via LLM
+CHAT_MODE = os.getenv("CHAT_MODE", "hybrid")
+RETRIEVAL_THRESHOLD = float(os.getenv("RETRIEVAL_THRESHOLD", "0.5"))
+RETRIEVAL_MARGIN    = float(os.getenv("RETRIEVAL_MARGIN", "0.15"))
+# abaixo disso, no modo retrieval, responde com o fallback
+RETRIEVAL_MIN_SCORE = float(os.getenv("RETRIEVAL_MIN_SCORE", "0.2"))
+
+_ROUTE = re.compile(r"/dashboard[\w/\-]*\w")
+
+
+def llm_enabled() -> bool:
+    return CHAT_MODE != "retrieval"
+
+
+class Hit(NamedTuple):
+    key: str
+    score: float
+    margin: float
+    reply: str
+
+    @property
+    def confident(self) -> bool:
+        return self.score >= RETRIEVAL_THRESHOLD and self.margin >= RETRIEVAL_MARGIN
+
+
+def _template(entry: str) -> str:
+    title, _, rest = entry.partition(":")
+    desc = rest.split("Acesse:")[0].strip()
+    routes = " ou ".join(f"'{r}'" for r in _ROUTE.findall(entry))
+    return f"Para acessar {title.strip()}, navegue até {routes}. {desc}"
+
+
+def _example_pairs() -> List[tuple]:
+    pairs = re.findall(r"Usuário: (.+)\nAssistente: (.+)", EXAMPLES)
+    return [(q.strip(), a.strip()) for q, a in pairs]
+
+
+class Retriever:
+    """
+    Índice vetorial sobre SERVICE_INFO, perguntas de EXAMPLES e linhas do
+    system_context.txt; cada documento aponta para uma entrada de
+    SERVICE_INFO, cuja resposta é montada por template.
+    """
+    def __init__(self):
+        self._lock = Lock()
+        self._fingerprint = ""
+        # (índice, chaves, rótulo de cada documento, respostas por chave)
+        self._state: Optional[tuple] = None
+
+    def _key_for_route(self, route: str) -> Optional[str]:
+        for key, entry in SERVICE_INFO.items():
+            if route in _ROUTE.findall(entry):
+                return key
+        return None
+
+    def _build(self) -> tuple:
+        keys = list(SERVICE_INFO)
+        docs, labels = [], []
+        for i, key in enumerate(keys):
+            docs.append(f"{key} {SERVICE_INFO[key].split('Acesse:')[0]}")
+            labels.append(i)
+
+        for question, answer in _example_pairs():
+            routes = _ROUTE.findall(answer)
+            key = self._key_for_route(routes[0]) if routes else None
+            if key:
+                docs.append(question)
+                labels.append(keys.index(key))
+
+        titles = TfidfIndex([SERVICE_INFO[k].split(":")[0] for k in keys])
+        for line in load_system_context().splitlines():
+            line = line.strip().lstrip("- ")
+            if ":" not in line:
+                continue
+            routes = _ROUTE.findall(line)
+            key = self._key_for_route(routes[0]) if routes else None
+            if key is None:
+                scores = titles.scores(line.split(":")[0])
+                if scores.max() < 0.3:
+                    continue
+                key = keys[int(np.argmax(scores))]
+            docs.append(line)
+            labels.append(keys.index(key))
+
+        logger.info("Índice de recuperação: %d documentos, %d entradas", len(docs), len(keys))
+        return (
+            TfidfIndex(docs),
+            keys,
+            np.asarray(labels, dtype=np.int32),
+            [_template(SERVICE_INFO[k]) for k in keys],
+        )
+
+    def warm(self) -> tuple:
+        """
+        Garante o índice construído para o contexto atual.
+        """
+        fingerprint = context_fingerprint()
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                self._state = self._build()
+                self._fingerprint = fingerprint
+            return self._state
+
+    def search(self, question: str) -> Hit:
+        index, keys, labels, replies = self.warm()
+        doc_scores = index.scores(question)
+        # melhor documento por entrada de SERVICE_INFO
+        per_key = np.zeros(len(keys), dtype=np.float32)
+        np.maximum.at(per_key, labels, doc_scores)
+        order = np.argsort(per_key)[::-1]
+        best = int(order[0])
+        second = float(per_key[order[1]]) if len(order) > 1 else 0.0
+        score = float(per_key[best])
+        return Hit(keys[best], score, score - second, replies[best])
+
+
+retriever = Retriever()
@@ -0,0 +1,204 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Deque, Iterator, Optional, Tuple
+
+logger = logging.getLogger("session_store")
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    logger.addHandler(handler)
+
+SESSION_BACKEND   = os.getenv("SESSION_BACKEND", "memory")
+SESSION_TTL       = float(os.getenv("SESSION_TTL", "3600"))
+SESSION_MAX       = int(os.getenv("SESSION_MAX", "10000"))
+SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "10"))
+# /dev/shm mantém o arquivo em memória compartilhada quando disponível
+SESSION_DB_PATH   = os.getenv(
+    "SESSION_DB_PATH",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else "/tmp", "chat_sessions.sqlite3"),
+)
+
+
+class Session:
+    """
+    Estado de uma conversa. O histórico é um ring buffer com os últimos
+    `max_turns` pares (usuário, assistente).
+    """
+    __slots__ = ("id", "turns", "last_product", "touched")
+
+    def __init__(self, session_id: str, max_turns: int = SESSION_MAX_TURNS):
+        self.id = session_id
+        self.turns: Deque[Tuple[str, str]] = deque(maxlen=max_turns)
+        self.last_product: Optional[str] = None
+        self.touched = time.time()
+
+    def add_turn(self, user_message: str, reply: str) -> None:
+        self.turns.append((user_message, reply))
+
+    def user_turns(self) -> int:
+        return len(self.turns)
+
+    def lines(self) -> Iterator[str]:
+        for user, assistant in self.turns:
+            yield f"Usuário: {user}"
+            yield f"Assistente: {assistant}"
+
+    def size_bytes(self) -> int:
+        return (
+            sys.getsizeof(self.turns)
+            + sum(sys.getsizeof(u) + sys.getsizeof(a) for u, a in self.turns)
+            + sys.getsizeof(self.last_product or "")
+        )
+
+    def to_json(self) -> str:
+        return json.dumps({"turns": list(self.turns), "last_product": self.last_product}, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, session_id: str, raw: str, max_turns: int = SESSION_MAX_TURNS) -> "Session":
+        data = json.loads(raw)
+        sess = cls(session_id, max_turns)
+        sess.turns.extend(tuple(t) for t in data.get("turns", []))
+        sess.last_product = data.get("last_product")
+        return sess
+
+
+class SessionStore(ABC):
+    """
+    Interface do armazenamento de sessões: `get` cria a sessão se não
+    existir (ou se expirou) e `save` persiste as alterações.
+    """
+    @abstractmethod
+    def get(self, session_id: str) -> Session: ...
+
+    @abstractmethod
+    def save(self, session: Session) -> None: ...
+
+    @abstractmethod
+    def stats(self) -> dict: ...
+
+
+class InMemorySessionStore(SessionStore):
+    def __init__(self, ttl: float = SESSION_TTL, max_sessions: int = SESSION_MAX,
+                 max_turns: int = SESSION_MAX_TURNS):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self._data: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _expire(self, now: float) -> None:
+        # a ordem LRU também é a ordem de último acesso
+        while self._data:
+            sess = next(iter(self._data.values()))
+            if now - sess.touched <= self.ttl and len(self._data) <= self.max_sessions:
+                break
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, session_id: str) -> Session:
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            sess = self._data.get(session_id)
+            if sess is None:
+                sess = self._data[session_id] = Session(session_id, self.max_turns)
+                self._expire(now)
+            self._data.move_to_end(session_id)
+            sess.touched = now
+            return sess
+
+    def save(self, session: Session) -> None:
+        session.touched = time.time()
+
+    def stats(self) -> dict:
+        with self._lock:
+            sessions = list(self._data.values())
+        return {
+            "backend": "memory",
+            "sessions": len(sessions),
+            "evictions": self.evictions,
+            "memory_bytes": sum(s.size_bytes() for s in sessions),
+        }
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessões num arquivo SQLite (modo WAL) compartilhado entre os workers
+    do uvicorn, para que qualquer worker atenda o mesmo `session_id`.
+    """
+    def __init__(self, path: str = SESSION_DB_PATH, ttl: float = SESSION_TTL,
+                 max_sessions: int = SESSION_MAX, max_turns: int = SESSION_MAX_TURNS):
+        self.path = path
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self._local = threading.local()
+        self._saves = 0
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                " id TEXT PRIMARY KEY, data TEXT NOT NULL, touched REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_touched ON sessions(touched)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, session_id: str) -> Session:
+        row = self._conn().execute(
+            "SELECT data FROM sessions WHERE id = ? AND touched >= ?",
+            (session_id, time.time() - self.ttl),
+        ).fetchone()
+        if row is None:
+            return Session(session_id, self.max_turns)
+        return Session.from_json(session_id, row[0], self.max_turns)
+
+    def save(self, session: Session) -> None:
+        session.touched = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO sessions (id, data, touched) VALUES (?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET data = excluded.data, touched = excluded.touched",
+            (session.id, session.to_json(), session.touched),
+        )
+        self._saves += 1
+        if self._saves % 100 == 0:
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM sessions WHERE touched < ?", (time.time() - self.ttl,))
+        conn.execute(
+            "DELETE FROM sessions WHERE id IN ("
+            " SELECT id FROM sessions ORDER BY touched DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,),
+        )
+
+    def stats(self) -> dict:
+        count, size = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM sessions"
+        ).fetchone()
+        return {"backend": "sqlite", "sessions": count, "memory_bytes": size, "path": self.path}
+
+
+def create_session_store(backend: str = SESSION_BACKEND) -> SessionStore:
+    if backend == "sqlite":
+        logger.info("Sessões em SQLite: %s", SESSION_DB_PATH)
+        return SQLiteSessionStore()
+    if backend != "memory":
+        logger.warning("SESSION_BACKEND desconhecido '%s', usando memória", backend)
+    return InMemorySessionStore()
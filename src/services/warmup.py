@@ -0,0 +1,93 @@
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.utils.metrics import REGISTRY
+
+logger = logging.getLogger("warmup")
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    logger.addHandler(handler)
+
+
+def _process_start() -> float:
+    """
+    Instante (epoch) em que o processo começou, para que o time-to-ready
+    inclua os imports; sem /proc, o import deste módulo.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/stat") as f:
+            btime = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+        return btime + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration):
+        return time.time()
+
+
+class Warmup:
+    """
+    Aquecimento em segundo plano: o app aceita tráfego logo após o import
+    e os caminhos sem LLM já respondem enquanto os modelos carregam.
+    """
+    def __init__(self):
+        self.process_start = _process_start()
+        self.loading = False
+        self.ready = False
+        self.error: Optional[str] = None
+        self.time_to_ready: Optional[float] = None
+        self.stages: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def start(self, steps: List[Tuple[str, Callable[[], object]]]) -> None:
+        with self._lock:
+            if self.loading or self.ready:
+                return
+            self.loading = True
+            self.error = None
+        threading.Thread(target=self._run, args=(steps,), name="warmup", daemon=True).start()
+
+    def _run(self, steps: List[Tuple[str, Callable[[], object]]]) -> None:
+        try:
+            for name, step in steps:
+                start = time.perf_counter()
+                step()
+                self.stages[name] = round(time.perf_counter() - start, 3)
+                logger.info("✅  %s em %.2fs", name, self.stages[name])
+            self.time_to_ready = round(time.time() - self.process_start, 3)
+            self.ready = True
+            logger.info("🚀  Pronto em %.2fs desde o início do processo", self.time_to_ready)
+        except Exception as exc:
+            self.error = f"{type(exc).__name__}: {exc}"
+            logger.exception("Falha no aquecimento")
+        finally:
+            self.loading = False
+
+    def status(self) -> dict:
+        state = "ready" if self.ready else "warming" if self.loading else "failed" if self.error else "idle"
+        return {
+            "status": state,
+            "time_to_ready": self.time_to_ready,
+            "uptime": round(time.time() - self.process_start, 3),
+            "stages": dict(self.stages),
+            "error": self.error,
+        }
+
+
+warmup = Warmup()
+
+
+def _ready_samples():
+    if warmup.time_to_ready is not None:
+        yield "", {}, warmup.time_to_ready
+
+def _stage_samples():
+    for name, seconds in list(warmup.stages.items()):
+        yield "", {"stage": name}, seconds
+
+REGISTRY.collector("chat_time_to_ready_seconds", "gauge", "Do início do processo até o fim do aquecimento.", _ready_samples)
+REGISTRY.collector("chat_warmup_stage_seconds", "gauge", "Duração de cada etapa do aquecimento.", _stage_samples)
@@ -0,0 +1,113 @@
+import os
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+from src.utils.product_extractor import _sanitize, _strip_accents
+from src.utils.text_vectors import STOPWORDS, char_ngrams
+
+CATALOG_THRESHOLD = float(os.getenv("CATALOG_THRESHOLD", "0.6"))
+MAX_NAME_WORDS = 4
+
+# palavras da própria pergunta (já passadas por _sanitize) que nunca são produto
+_QUERY_WORDS = frozenset("""
+quanto quanta qtd qtdade tem tenho possui possuimo mostrar listar lista
+codigo estoque inventario produto item unidade ha existe
+""".split())
+
+
+def _words(text: str) -> List[str]:
+    words = (_sanitize(w) for w in _strip_accents(text).split())
+    return [w for w in words if w]
+
+def _grams(key: str) -> FrozenSet[str]:
+    return frozenset(char_ngrams(key, sizes=(3,)))
+
+
+class CatalogIndex:
+    """
+    Índice de trigramas sobre os nomes de produto de uma empresa. Resolve a
+    menção a um produto numa frase comparando janelas de 1..4 palavras com
+    os nomes do catálogo (coeficiente de Dice sobre trigramas), de forma
+    determinística e tolerante a erros de digitação e plurais.
+    """
+    def __init__(self, names: Iterable[str]):
+        self.names: List[str] = []
+        self._grams: List[FrozenSet[str]] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        seen = set()
+        for name in names:
+            key = " ".join(_words(str(name)))
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            pid = len(self.names)
+            self.names.append(str(name).strip())
+            grams = _grams(key)
+            self._grams.append(grams)
+            for gram in grams:
+                self._postings[gram].append(pid)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _candidates(self, words: List[str]) -> Iterable[Tuple[int, int, str]]:
+        for size in range(1, MAX_NAME_WORDS + 1):
+            for i in range(len(words) - size + 1):
+                window = words[i:i + size]
+                # a janela não começa nem termina em palavra vazia
+                if window[0] in STOPWORDS or window[-1] in STOPWORDS:
+                    continue
+                if size == 1 and window[0] in _QUERY_WORDS:
+                    continue
+                yield i, i + size, " ".join(window)
+
+    def _scored(self, sentence: str, threshold: float) -> Iterable[Tuple[float, int, int, int]]:
+        """
+        (score, início, fim, produto) de cada janela da frase parecida o
+        bastante com algum nome do catálogo.
+        """
+        for start, end, window in self._candidates(_words(sentence)):
+            grams = _grams(window)
+            overlap: Dict[int, int] = defaultdict(int)
+            for gram in grams:
+                for pid in self._postings.get(gram, ()):
+                    overlap[pid] += 1
+            for pid, shared in overlap.items():
+                score = round(2 * shared / (len(grams) + len(self._grams[pid])), 6)
+                if score >= threshold:
+                    yield score, start, end, pid
+
+    def match(self, sentence: str, threshold: float = CATALOG_THRESHOLD) -> str:
+        """
+        Nome do produto do catálogo mais parecido com alguma janela da
+        frase, ou "" se nenhum atingir `threshold`. Empates: maior nome,
+        depois ordem alfabética.
+        """
+        if not self.names:
+            return ""
+        best = None  # (-score, -len(nome), nome): o menor vence
+        for score, _, _, pid in self._scored(sentence, threshold):
+            name = self.names[pid]
+            key = (-score, -len(name), name)
+            if best is None or key < best:
+                best = key
+        return best[2] if best else ""
+
+    def match_all(self, sentence: str, threshold: float = CATALOG_THRESHOLD) -> List[str]:
+        """
+        Todos os produtos mencionados, na ordem da frase: as melhores
+        janelas vencem (mesmo critério de `match`) e janelas sobrepostas a
+        uma já aceita são descartadas.
+        """
+        if not self.names:
+            return []
+        ranked = sorted(
+            self._scored(sentence, threshold),
+            key=lambda c: (-c[0], -len(self.names[c[3]]), self.names[c[3]]),
+        )
+        taken: List[Tuple[int, int, int]] = []  # (início, fim, produto)
+        for _, start, end, pid in ranked:
+            if any(pid == p or (start < e and s < end) for s, e, p in taken):
+                continue
+            taken.append((start, end, pid))
+        return [self.names[pid] for _, _, pid in sorted(taken)]
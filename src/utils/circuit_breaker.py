@@ -0,0 +1,67 @@
+import os
+import time
+from threading import Lock
+
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET    = float(os.getenv("BREAKER_RESET", "10"))
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+
+class CircuitOpen(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Abre após `threshold` falhas consecutivas e rejeita chamadas na hora
+    por `reset_after` segundos; depois deixa passar uma única sonda
+    (meio-aberto), cujo resultado fecha ou reabre o circuito.
+    """
+    def __init__(self, name: str, threshold: int = BREAKER_FAILURES, reset_after: float = BREAKER_RESET):
+        self.name = name
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._probing = False
+        self._lock = Lock()
+
+    def allow(self) -> None:
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_after:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            self.rejected += 1
+        raise CircuitOpen(f"circuito aberto: {self.name}")
+
+    def success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self) -> None:
+        """
+        A chamada terminou sem dizer nada sobre a saúde do endpoint
+        (ex.: prazo da requisição esgotado antes da resposta).
+        """
+        with self._lock:
+            self._probing = False
+
+    def stats(self) -> dict:
+        return {"state": self.state, "failures": self.failures, "rejected": self.rejected}
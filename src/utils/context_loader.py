@@ -1,4 +1,9 @@
+import os
+import hashlib
 import logging
+from threading import Lock
+
+from src.config.constants import SERVICE_INFO, EXAMPLES
 
 logger = logging.getLogger("context_loader")
 logger.setLevel(logging.DEBUG)
@@ -8,13 +13,39 @@ if not logger.handlers:
     handler.setFormatter(formatter)
     logger.addHandler(handler)
 
+CONTEXT_FILE = "system_context.txt"
+
+_lock = Lock()
+_cached: tuple = (None, "")  # (mtime_ns, size), conteúdo
+
 def load_system_context() -> str:
     """
     Lê o conteúdo de 'system_context.txt' para uso como contexto do sistema.
+    O arquivo só é relido quando mtime ou tamanho mudam.
     """
+    global _cached
     try:
-        with open("system_context.txt", "r", encoding="utf-8") as file:
-            return file.read().strip()
+        st = os.stat(CONTEXT_FILE)
+        stamp = (st.st_mtime_ns, st.st_size)
+        with _lock:
+            if _cached[0] == stamp:
+                return _cached[1]
+        with open(CONTEXT_FILE, "r", encoding="utf-8") as file:
+            content = file.read().strip()
+        with _lock:
+            _cached = (stamp, content)
+        logger.debug("system_context.txt (re)carregado")
+        return content
     except Exception as e:
         logger.error("Erro ao carregar system_context.txt, usando contexto default.", exc_info=True)
         return "Contexto default."
+
+def context_fingerprint() -> str:
+    """
+    Hash do contexto estático (system_context.txt, SERVICE_INFO e EXAMPLES);
+    muda sempre que qualquer um deles muda.
+    """
+    h = hashlib.sha1(load_system_context().encode("utf-8"))
+    h.update(repr(sorted(SERVICE_INFO.items())).encode("utf-8"))
+    h.update(EXAMPLES.encode("utf-8"))
+    return h.hexdigest()
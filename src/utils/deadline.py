@@ -0,0 +1,48 @@
+import os
+import time
+import contextvars
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+# orçamento de latência das chamadas ao backend por mensagem: a soma das
+# consultas (empresa, catálogo, estoque...) não passa disso
+BACKEND_BUDGET = float(os.getenv("BACKEND_BUDGET", "8"))
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+@contextmanager
+def budget(seconds: float = BACKEND_BUDGET) -> Iterator[None]:
+    """
+    Define o prazo (monotônico) da requisição corrente; um prazo já em
+    vigor mais curto prevalece. Propaga-se às threads que copiam o contexto.
+    """
+    current = _deadline.get()
+    deadline = time.monotonic() + seconds
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def timeout(default: float) -> float:
+    """
+    Timeout de uma chamada: o menor entre `default` e o que resta do prazo.
+    Levanta DeadlineExceeded se o prazo já se esgotou.
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded("prazo da requisição esgotado")
+    return min(default, left)
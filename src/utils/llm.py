@@ -1,23 +1,44 @@
-import os, logging, os, multiprocessing
-from threading import Lock
-from typing import Optional
-from gpt4all import GPT4All
+from __future__ import annotations
+import os, json, logging
+from typing import TYPE_CHECKING, Optional
+
+from src.utils import model_registry
+
+if TYPE_CHECKING:
+    from gpt4all import GPT4All
 
 _MODEL_FILE = os.getenv("MODEL_FILE", "/app/model/model.gguf")
+# relatório gravado pelo download_model.py ao escolher a variante GGUF
+MODEL_REPORT = os.getenv("MODEL_REPORT") or os.path.join(os.path.dirname(_MODEL_FILE), "selection.json")
 
 _logger = logging.getLogger("llm")
 _logger.setLevel(logging.INFO)
 if not _logger.handlers:
     _logger.addHandler(logging.StreamHandler())
 
-_lock   = Lock()
-_model: Optional[GPT4All] = None
-
 def get_model() -> GPT4All:
-    global _model
-    with _lock:
-        if _model is None:
-            _logger.info("Carregando LLM principal %s …", _MODEL_FILE)
-            _model = GPT4All(_MODEL_FILE,
-                             n_threads=multiprocessing.cpu_count() or 4)
-        return _model
+    return model_registry.get(_MODEL_FILE)
+
+def log_selection_report(path: str = MODEL_REPORT) -> Optional[dict]:
+    """
+    Loga (no startup) por que esta variante GGUF foi escolhida.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            report = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        _logger.warning("Relatório de seleção do modelo ilegível: %s", path, exc_info=True)
+        return None
+    _logger.info("Variante GGUF: %s (seleção %s)", report.get("selected"), report.get("mode"))
+    for c in report.get("candidates", []):
+        if "error" in c:
+            _logger.info("  %s: falhou (%s)", c["file"], c["error"])
+            continue
+        _logger.info(
+            "  %s: carga %.2fs, prefill %s tok/s, decode %s tok/s, %.3fs/pergunta, pico RSS %.0f MiB, acerto %.0f%%%s",
+            c["file"], c["load_s"], c["prefill_tps"], c["decode_tps"], c["mean_s"],
+            c["peak_rss_mb"], 100 * c["accuracy"], "" if c.get("passed") else " (reprovado)",
+        )
+    return report
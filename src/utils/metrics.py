@@ -0,0 +1,171 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+# Métricas em processo no formato de exposição texto do Prometheus, sem
+# dependências: contadores e histogramas com labels, mais coletores
+# chamados no scrape para valores que já vivem em outros objetos (stats()).
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _fmt_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = []
+    for k, v in labels:
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{k}="{v}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _fmt_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, doc: str):
+        self.name = name
+        self.doc = doc
+        self._lock = Lock()
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(tuple(sorted(labels.items())), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        lines += [f"{self.name}{_fmt_labels(k)} {_fmt_value(v)}" for k, v in items]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, doc: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.doc = doc
+        self.buckets = tuple(sorted(buckets))
+        self._lock = Lock()
+        # labels -> [contagem por bucket (não cumulativa) + overflow, soma, total]
+        self._values: Dict[Labels, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][idx] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(tuple(sorted(labels.items())))
+            return state[2] if state else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(k, list(s[0]), s[1], s[2]) for k, s in self._values.items()]
+        for key, counts, total, n in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                lines.append(f"{self.name}_bucket{_fmt_labels(key + (('le', _fmt_value(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_fmt_labels(key)} {_fmt_value(total)}")
+            lines.append(f"{self.name}_count{_fmt_labels(key)} {n}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._lock = Lock()
+        self._metrics: Dict[str, object] = {}
+        # nome -> (tipo, doc, função que retorna amostras)
+        self._collectors: Dict[str, Tuple[str, str, Callable[[], Iterable[Sample]]]] = {}
+
+    def counter(self, name: str, doc: str) -> Counter:
+        with self._lock:
+            return self._metrics.setdefault(name, Counter(name, doc))
+
+    def histogram(self, name: str, doc: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            return self._metrics.setdefault(name, Histogram(name, doc, buckets))
+
+    def collector(self, name: str, kind: str, doc: str, fn: Callable[[], Iterable[Sample]]) -> None:
+        """
+        Registra `fn`, chamada a cada scrape; cada amostra é
+        (sufixo do nome, labels, valor).
+        """
+        with self._lock:
+            self._collectors[name] = (kind, doc, fn)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors.items())
+        lines: List[str] = []
+        for metric in metrics:
+            lines += metric.render()
+        for name, (kind, doc, fn) in collectors:
+            try:
+                samples = list(fn())
+            except Exception:
+                continue
+            lines += [f"# HELP {name} {doc}", f"# TYPE {name} {kind}"]
+            lines += [
+                f"{name}{suffix}{_fmt_labels(sorted(labels.items()))} {_fmt_value(value)}"
+                for suffix, labels, value in samples
+            ]
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.histogram("chat_request_seconds", "Latência das requisições HTTP por rota.")
+STAGE_SECONDS = REGISTRY.histogram("chat_stage_seconds", "Latência de cada etapa do atendimento.")
+PATH_TOTAL = REGISTRY.counter("chat_path_total", "Mensagens por caminho de atendimento.")
+TOKENS_GENERATED = REGISTRY.counter("chat_llm_tokens_generated_total", "Tokens gerados pelo LLM.")
+TOKENS_PER_SECOND = REGISTRY.histogram(
+    "chat_llm_tokens_per_second", "Velocidade de decodificação por geração.",
+    buckets=(1, 2, 5, 10, 15, 20, 30, 50, 75, 100, 200),
+)
+EXTRACTOR_TOTAL = REGISTRY.counter(
+    "chat_extractor_total", "Extração de produto por método (regex, catalog, llm, none)."
+)
+BACKEND_REQUESTS = REGISTRY.counter(
+    "chat_backend_requests_total",
+    "Chamadas ao backend por endpoint e resultado (ok, error, timeout, deadline, open).",
+)
+BACKEND_SECONDS = REGISTRY.histogram("chat_backend_seconds", "Latência das chamadas ao backend.")
+BACKEND_HEDGES = REGISTRY.counter("chat_backend_hedges_total", "Segundas tentativas (hedge) por endpoint.")
+
+
+@contextmanager
+def timer(histogram: Histogram = STAGE_SECONDS, **labels) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start, **labels)
+
+
+def stage(name: str):
+    """
+    Atalho: `with stage("route"): ...` observa chat_stage_seconds{stage=...}.
+    """
+    return timer(STAGE_SECONDS, stage=name)
@@ -0,0 +1,106 @@
+from __future__ import annotations
+import os
+import time
+import logging
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+_logger = logging.getLogger("model_registry")
+_logger.setLevel(logging.INFO)
+if not _logger.handlers:
+    _logger.addHandler(logging.StreamHandler())
+
+# com vários processos (workers, servidor de inferência) limite as threads
+# de cada modelo para não disputar os mesmos núcleos
+DEFAULT_THREADS = int(os.getenv("MODEL_THREADS", "0")) or os.cpu_count() or 4
+
+# classe do gpt4all, importada só no primeiro carregamento: o pacote (e sua
+# lib nativa) fica fora do caminho de startup
+GPT4All = None
+
+
+def _model_class():
+    global GPT4All
+    if GPT4All is None:
+        from gpt4all import GPT4All as cls
+        GPT4All = cls
+    return GPT4All
+
+
+class _Entry:
+    __slots__ = ("model_file", "params", "model", "load_seconds", "rss_bytes", "load_lock", "gen_lock")
+
+    def __init__(self, model_file: str, params: dict):
+        self.model_file = model_file
+        self.params = params
+        self.model: Optional[GPT4All] = None
+        self.load_seconds = 0.0
+        self.rss_bytes = 0
+        self.load_lock = Lock()
+        # GPT4All não é thread-safe: uma geração por instância de cada vez
+        self.gen_lock = Lock()
+
+
+_lock = Lock()
+_entries: Dict[Tuple, _Entry] = {}
+_by_model: Dict[int, _Entry] = {}
+_fallback_lock = Lock()
+
+
+def _rss() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def get(model_file: str, **params) -> GPT4All:
+    """
+    Retorna a instância compartilhada de `model_file` para os parâmetros de
+    carga informados, carregando-a na primeira chamada.
+    """
+    params.setdefault("n_threads", DEFAULT_THREADS)
+    key = (model_file, tuple(sorted(params.items())))
+    with _lock:
+        entry = _entries.setdefault(key, _Entry(model_file, params))
+
+    with entry.load_lock:
+        if entry.model is None:
+            _logger.info("Carregando modelo %s %s …", model_file, params)
+            rss_before, start = _rss(), time.perf_counter()
+            entry.model = _model_class()(model_file, **params)
+            entry.load_seconds = time.perf_counter() - start
+            entry.rss_bytes = max(_rss() - rss_before, 0)
+            with _lock:
+                _by_model[id(entry.model)] = entry
+            _logger.info(
+                "Modelo %s carregado em %.2fs (+%.1f MiB RSS)",
+                model_file, entry.load_seconds, entry.rss_bytes / 2**20,
+            )
+        return entry.model
+
+
+def generation_lock(model: GPT4All) -> Lock:
+    """
+    Lock que serializa as gerações numa mesma instância de modelo.
+    """
+    with _lock:
+        entry = _by_model.get(id(model))
+    return entry.gen_lock if entry else _fallback_lock
+
+
+def stats() -> list[dict]:
+    with _lock:
+        entries = list(_entries.values())
+    return [
+        {
+            "model_file": e.model_file,
+            "params": e.params,
+            "loaded": e.model is not None,
+            "load_seconds": round(e.load_seconds, 3),
+            "rss_bytes": e.rss_bytes,
+        }
+        for e in entries
+    ]
@@ -0,0 +1,164 @@
+from __future__ import annotations
+import os
+import time
+import hashlib
+import logging
+from threading import Lock
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.utils.metrics import STAGE_SECONDS, TOKENS_GENERATED, TOKENS_PER_SECOND
+
+if TYPE_CHECKING:
+    from gpt4all import GPT4All
+
+logger = logging.getLogger("prefix_cache")
+logger.setLevel(logging.DEBUG)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    logger.addHandler(handler)
+
+PREFILL_BATCH = int(os.getenv("PREFILL_BATCH", "128"))
+
+ResponseCallback = Callable[[int, str], bool]
+
+def _always(_token_id: int, _response: str) -> bool:
+    return True
+
+
+class _Meter:
+    """
+    Envolve o callback de tokens para separar prefill (até o primeiro
+    token) de decodificação e contar os tokens gerados.
+    """
+    __slots__ = ("callback", "start", "first", "tokens")
+
+    def __init__(self, callback: ResponseCallback):
+        self.callback = callback
+        self.start = time.perf_counter()
+        self.first = None
+        self.tokens = 0
+
+    def __call__(self, token_id: int, response: str) -> bool:
+        if self.first is None:
+            self.first = time.perf_counter()
+        self.tokens += 1
+        return self.callback(token_id, response)
+
+    def done(self) -> None:
+        end = time.perf_counter()
+        first = self.first or end
+        STAGE_SECONDS.observe(first - self.start, stage="prefill")
+        STAGE_SECONDS.observe(end - first, stage="decode")
+        TOKENS_GENERATED.inc(self.tokens)
+        if self.tokens > 1 and end > first:
+            TOKENS_PER_SECOND.observe((self.tokens - 1) / (end - first))
+
+
+class PrefixCache:
+    """
+    Mantém o prefixo estático (system + few-shot) já avaliado no contexto do
+    modelo. Cada requisição volta `n_past` para o fim do prefixo e só faz o
+    prefill do turno do usuário.
+
+    Deve ser usado sob `model_registry.generation_lock(model)`.
+    """
+    def __init__(self):
+        self._lock = Lock()
+        # id(model) -> (hash do prefixo, n_past após o prefixo, tokens do prefixo)
+        self._states: Dict[int, Tuple[str, int, list]] = {}
+        self.hits = 0
+        self.misses = 0
+        # chamados com (prefixo, tokens) a cada prefill real
+        self._observers: List[Callable[[str, int], None]] = []
+
+    def on_prefill(self, fn: Callable[[str, int], None]) -> None:
+        self._observers.append(fn)
+
+    @staticmethod
+    def _llmodel(model: GPT4All):
+        llm = getattr(model, "model", None)
+        return llm if hasattr(llm, "prompt_model") and hasattr(llm, "context") else None
+
+    def _resident(self, llm, key: str) -> Optional[int]:
+        with self._lock:
+            state = self._states.get(id(llm))
+        if not state or state[0] != key or llm.context is None:
+            return None
+        _, n_past, tokens = state
+        ctx = llm.context
+        # outra chamada (ex.: extrator) pode ter reutilizado o contexto
+        try:
+            if ctx.tokens_size < n_past or ctx.tokens[:n_past] != tokens:
+                return None
+        except (ValueError, TypeError):
+            return None
+        return n_past
+
+    def prefill(self, model: GPT4All, prefix: str) -> bool:
+        """
+        Garante que `prefix` está avaliado no contexto do modelo.
+        Retorna False se o modelo não expõe o contexto de prompt (sem cache).
+        """
+        llm = self._llmodel(model)
+        if llm is None:
+            return False
+        key = hashlib.sha1(prefix.encode("utf-8")).hexdigest()
+        n_past = self._resident(llm, key)
+        if n_past is not None:
+            llm.context.n_past = n_past
+            self.hits += 1
+            return True
+
+        llm.prompt_model(prefix, "%1", _always, n_predict=0, n_batch=PREFILL_BATCH, reset_context=True)
+        ctx = llm.context
+        with self._lock:
+            self._states[id(llm)] = (key, ctx.n_past, ctx.tokens[:ctx.n_past])
+        self.misses += 1
+        logger.info("Prefixo avaliado: %d tokens", ctx.n_past)
+        for fn in self._observers:
+            fn(prefix, ctx.n_past)
+        return True
+
+    def generate(self, model: GPT4All, prefix: str, suffix: str,
+                 callback: ResponseCallback = _always, **kwargs) -> str:
+        meter = _Meter(callback)
+        try:
+            if not self.prefill(model, prefix):
+                with model.chat_session() as chat:
+                    return chat.generate(prompt=prefix + suffix, callback=meter, **kwargs)
+
+            out = []
+            def collect(token_id: int, response: str) -> bool:
+                out.append(response)
+                return meter(token_id, response)
+
+            self._llmodel(model).prompt_model(suffix, "%1", collect, **self._gen_kwargs(kwargs))
+            return "".join(out)
+        finally:
+            meter.done()
+
+    def stream(self, model: GPT4All, prefix: str, suffix: str,
+               callback: ResponseCallback = _always, **kwargs) -> Iterator[str]:
+        meter = _Meter(callback)
+        try:
+            if not self.prefill(model, prefix):
+                with model.chat_session() as chat:
+                    yield from chat.generate(prompt=prefix + suffix, streaming=True, callback=meter, **kwargs)
+                return
+            yield from self._llmodel(model).prompt_model_streaming(suffix, "%1", meter, **self._gen_kwargs(kwargs))
+        finally:
+            meter.done()
+
+    @staticmethod
+    def _gen_kwargs(kwargs: dict) -> dict:
+        kwargs = dict(kwargs)
+        kwargs["n_predict"] = kwargs.pop("max_tokens", 200)
+        kwargs["reset_context"] = False
+        return kwargs
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+prefix_cache = PrefixCache()
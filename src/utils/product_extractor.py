@@ -4,10 +4,15 @@ import re
 import logging
 import unidecode
 import unicodedata
-from typing import Optional
+from typing import TYPE_CHECKING
 from functools import lru_cache
-from threading import Lock
-from gpt4all import GPT4All
+
+from src.utils import model_registry
+from src.utils.worker_pool import llm_pool, PoolSaturated
+from src.inference.client import inference
+
+if TYPE_CHECKING:
+    from gpt4all import GPT4All
 
 # ──────────────────────────── logger ────────────────────────────
 logger = logging.getLogger("product_extractor")
@@ -45,27 +50,62 @@ _REGEX = re.compile(
     r"(?:\s*(?:invent[aá]rio|estoque|produto))?"
 )
 
+# itens seguintes de uma enumeração: "parafusos, porcas e arruelas" ou
+# "parafusos e quantas porcas" (a palavra de quantidade repetida é pulada)
+_NEXT_ITEM = re.compile(
+    r"(?i)\s*(?:,\s*(?:e\s+)?|\s+(?:e|ou)\s+)"
+    r"(?:(?:quant[oa]s?|qtd)\s+)?"
+    r"(?:(?:o|a|os|as|do|da|dos|das|de)\s+)?(?P<prod>\w{2,})"
+)
+# encerram a enumeração ("e onde vejo…", "e o que mais…"); já no formato de
+# _sanitize (sem acento, sem plural)
+_NOT_PRODUCT = frozenset({
+    "eu", "no", "nos", "voce", "ele", "ela", "quanto", "quanta",
+    "onde", "aonde", "que", "qual", "quai", "como", "quando", "quem", "porque", "cade",
+    "mai", "tambem", "ainda", "depoi", "entao", "tudo", "todo", "toda", "outro", "outra",
+    "meu", "minha", "nosso", "nossa", "seu", "sua", "isso", "esse", "essa", "este", "esta",
+    "tem", "tenho", "ver", "vejo", "mostrar", "para", "pra", "por",
+})
+
 # ────────────────────────── mini-modelo ─────────────────────────
-_MODEL_FILE = os.getenv("MODEL_FILE", "/app/model/model.gguf")
-_lock       = Lock()
-_model: Optional[GPT4All] = None
+# Usa um modelo pequeno dedicado se EXTRACTOR_MODEL_FILE estiver definido;
+# senão compartilha a mesma instância do LLM principal via registry.
+_MODEL_FILE = os.getenv("EXTRACTOR_MODEL_FILE") or os.getenv("MODEL_FILE", "/app/model/model.gguf")
 
 def _get_model() -> GPT4All:
-    global _model
-    with _lock:
-        if _model is None:
-            logger.info("Carregando modelo tiny p/ extractor: %s", _MODEL_FILE)
-            _model = GPT4All(_MODEL_FILE, n_threads=os.cpu_count() or 4)
-        return _model
+    return model_registry.get(_MODEL_FILE)
+
+def _generate(prompt: str) -> str:
+    if inference is not None:
+        return inference.chat(prompt, model="extractor", max_tokens=8, temp=0.2)
+    mdl = _get_model()
+    with model_registry.generation_lock(mdl), mdl.chat_session() as chat:
+        return chat.generate(prompt=prompt, max_tokens=8, temp=0.2)
 
 # ─────────────────────── função pública ─────────────────────────
-@lru_cache(maxsize=1024)
-def extract_product(sentence: str) -> str:
-    if m := _REGEX.search(sentence):
-        prod = _sanitize(m.group("prod"))
-        logger.debug("Regex capturou: %s", prod)
-        return prod
+def match_products(sentence: str) -> list[str]:
+    """
+    Extração determinística (somente regex): o primeiro produto e os que
+    seguem na enumeração ("quantos parafusos, porcas e arruelas"), sem
+    repetição; [] se não casar.
+    """
+    m = _REGEX.search(sentence)
+    if not m:
+        return []
+    products = [_sanitize(m.group("prod"))]
+    pos = m.end("prod")
+    while nxt := _NEXT_ITEM.match(sentence, pos):
+        word = _sanitize(nxt.group("prod"))
+        if word in _NOT_PRODUCT:
+            break
+        products.append(word)
+        pos = nxt.end()
+    products = list(dict.fromkeys(p for p in products if p))
+    logger.debug("Regex capturou: %s", products)
+    return products
 
+@lru_cache(maxsize=1024)
+def extract_product_with_llm(sentence: str) -> str:
     prompt = (
         "Você receberá uma frase. "
         "Se pedir códigos ou quantidade de um item, responda **somente** o nome do item "
@@ -73,13 +113,14 @@ def extract_product(sentence: str) -> str:
         f'Frase: "{sentence.strip()}"\nProduto:'
     )
     try:
-        mdl = _get_model()
-        with mdl.chat_session() as chat:
-            raw = chat.generate(prompt=prompt, max_tokens=8, temp=0.2)
+        raw = llm_pool.call(_generate, prompt)
         logger.debug("Extractor LLM cru: %s", raw)
         if not raw or raw.upper().startswith("NONE"):
             return ""
         return _sanitize(raw)
+    except PoolSaturated:
+        # não pode ficar no lru_cache: a saturação é transitória
+        raise
     except Exception:
         logger.exception("Extractor LLM failure")
         return ""
@@ -0,0 +1,81 @@
+import re
+import time
+import uuid
+import logging
+import contextvars
+from typing import Optional
+
+from src.utils.metrics import REQUEST_SECONDS
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+# ids vindos do cliente só são aceitos neste formato; senão gera-se um novo
+_VALID_ID = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+
+class _RequestLogRecord(logging.LogRecord):
+    """
+    LogRecord com o request-id corrente. Os loggers do projeto têm
+    formatters próprios; o id entra na mensagem já formatada, sem mexer em
+    `msg`/`args`.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.request_id = request_id.get()
+
+    def getMessage(self) -> str:
+        message = super().getMessage()
+        return f"[{self.request_id}] {message}" if self.request_id else message
+
+
+def install_log_request_id() -> None:
+    """
+    Faz todo LogRecord carregar o request-id corrente (idempotente).
+    """
+    if logging.getLogRecordFactory() is not _RequestLogRecord:
+        logging.setLogRecordFactory(_RequestLogRecord)
+
+
+class RequestContextMiddleware:
+    """
+    Middleware ASGI: define o request-id (reaproveita o cabeçalho
+    X-Request-ID do cliente, se for válido), devolve-o na resposta e mede a
+    latência por rota. Envolve também o corpo de respostas em streaming.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = dict(scope.get("headers") or []).get(REQUEST_ID_HEADER.lower().encode(), b"")
+        incoming = incoming.decode("latin-1")
+        rid = incoming if _VALID_ID.fullmatch(incoming) else uuid.uuid4().hex
+        token = request_id.set(rid)
+        status = {"code": 500}
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (REQUEST_ID_HEADER.lower().encode(), rid.encode("latin-1"))
+                ]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            # as rotas do serviço não têm parâmetros de caminho; sem rota
+            # casada (404, redirects) o caminho não vira label
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                route=scope["path"] if scope.get("route") else "unmatched",
+                method=scope["method"],
+                status=str(status["code"]),
+            )
+            request_id.reset(token)
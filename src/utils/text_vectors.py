@@ -0,0 +1,88 @@
+import re
+import zlib
+from typing import Iterable, Sequence
+
+import numpy as np
+
+from src.utils.product_extractor import _strip_accents
+
+STOPWORDS = frozenset("""
+a o as os um uma uns umas de do da dos das no na nos nas em ao aos
+para pra por pelo pela com sem e ou que se me eu meu minha meus minhas
+nosso nossa voce voces ele ela isso isto esse essa este esta aqui
+como onde qual quais quando posso consigo devo fazer faco vejo ver
+""".split())
+
+_NON_WORD = re.compile(r"[^a-z0-9/\s]")
+
+def normalize_question(text: str) -> str:
+    """
+    Sem acentos, minúsculas, sem pontuação e sem stopwords.
+    """
+    words = _NON_WORD.sub(" ", _strip_accents(text)).split()
+    return " ".join(w for w in words if w not in STOPWORDS)
+
+def char_ngrams(text: str, sizes: Sequence[int] = (3, 4)) -> Iterable[str]:
+    for word in text.split():
+        padded = f" {word} "
+        for n in sizes:
+            for i in range(max(len(padded) - n + 1, 1)):
+                yield padded[i:i + n]
+
+def hashed_vector(text: str, dim: int = 2048) -> np.ndarray:
+    """
+    Vetor TF (sublinear) de n-gramas de caracteres com hashing trick,
+    normalizado em L2. Dispensa vocabulário, serve para inserções incrementais.
+    """
+    vec = np.zeros(dim, dtype=np.float32)
+    for gram in char_ngrams(text):
+        vec[zlib.crc32(gram.encode("utf-8")) % dim] += 1.0
+    np.log1p(vec, out=vec)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+class TfidfIndex:
+    """
+    Índice TF-IDF de n-gramas de caracteres sobre um corpus fixo; a matriz
+    de documentos é pré-computada e normalizada, então uma consulta custa um
+    produto matriz-vetor.
+    """
+    def __init__(self, docs: Sequence[str]):
+        vocab: dict = {}
+        rows = []
+        for doc in docs:
+            counts: dict = {}
+            for gram in char_ngrams(normalize_question(doc)):
+                idx = vocab.setdefault(gram, len(vocab))
+                counts[idx] = counts.get(idx, 0) + 1
+            rows.append(counts)
+        self.vocab = vocab
+        tf = np.zeros((len(docs), len(vocab)), dtype=np.float32)
+        for i, counts in enumerate(rows):
+            for j, c in counts.items():
+                tf[i, j] = c
+        np.log1p(tf, out=tf)
+        df = np.count_nonzero(tf, axis=0)
+        self.idf = (np.log((1 + len(docs)) / (1 + df)) + 1.0).astype(np.float32)
+        self.matrix = self._normalize(tf * self.idf)
+
+    @staticmethod
+    def _normalize(m: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(m, axis=-1, keepdims=True)
+        return m / np.where(norms == 0, 1.0, norms)
+
+    def vector(self, text: str) -> np.ndarray:
+        vec = np.zeros(len(self.vocab), dtype=np.float32)
+        for gram in char_ngrams(normalize_question(text)):
+            idx = self.vocab.get(gram)
+            if idx is not None:
+                vec[idx] += 1.0
+        np.log1p(vec, out=vec)
+        return self._normalize(vec * self.idf)
+
+    def scores(self, text: str) -> np.ndarray:
+        """
+        Similaridade de cosseno entre `text` e cada documento do corpus.
+        """
+        return self.matrix @ self.vector(text)
@@ -0,0 +1,119 @@
+import time
+from threading import Lock
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Cache LRU limitado com expiração por entrada e single-flight: chamadas
+    concorrentes para a mesma chave compartilham um único carregamento.
+    Exceções do loader não são armazenadas.
+    """
+    def __init__(self, name: str, ttl: float, maxsize: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = Lock()
+        # invalidações durante um carregamento descartam o valor carregado
+        self._generation = 0
+        self.hits = self.misses = self.shared = self.evictions = 0
+
+    def _lookup(self, key: Hashable, count: bool = True) -> tuple[bool, Any]:
+        item = self._data.get(key)
+        if item is None:
+            return False, None
+        if item[0] < time.monotonic():
+            del self._data[key]
+            return False, None
+        self._data.move_to_end(key)
+        self.hits += count
+        return True, item[1]
+
+    def _store(self, key: Hashable, value: Any, generation: int) -> None:
+        if generation != self._generation:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], count: bool = True) -> Any:
+        """
+        `count=False` quando a falta já foi contada (ex.: por `get_many`).
+        """
+        with self._lock:
+            found, value = self._lookup(key, count)
+            if found:
+                return value
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._inflight[key] = Future()
+                self.misses += count
+                generation = self._generation
+            else:
+                self.shared += count
+        if not leader:
+            return fut.result()
+
+        try:
+            value = loader()
+        except BaseException as exc:
+            with self._lock:
+                self._inflight.pop(key, None)
+            fut.set_exception(exc)
+            raise
+        with self._lock:
+            self._inflight.pop(key, None)
+            self._store(key, value, generation)
+        fut.set_result(value)
+        return value
+
+    def get_many(self, keys: Iterable[Hashable]) -> Tuple[Dict[Hashable, Any], int]:
+        """
+        Valores já em cache para `keys` (sem carregar nada) e a geração
+        corrente, a ser passada a `put_many` depois de um carregamento em lote.
+        """
+        found = {}
+        with self._lock:
+            for key in keys:
+                ok, value = self._lookup(key)
+                if ok:
+                    found[key] = value
+                else:
+                    self.misses += 1
+            return found, self._generation
+
+    def put_many(self, items: Dict[Hashable, Any], generation: int) -> None:
+        with self._lock:
+            for key, value in items.items():
+                self._store(key, value, generation)
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """
+        Remove as entradas cuja chave satisfaz `predicate` (todas, se None).
+        Retorna quantas foram removidas.
+        """
+        with self._lock:
+            self._generation += 1
+            keys = [k for k in self._data if predicate is None or predicate(k)]
+            for k in keys:
+                del self._data[k]
+        return len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared": self.shared,
+                "evictions": self.evictions,
+            }
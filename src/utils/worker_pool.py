@@ -0,0 +1,160 @@
+import os
+import queue
+import asyncio
+import logging
+import threading
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterator
+
+logger = logging.getLogger("worker_pool")
+logger.setLevel(logging.INFO)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    logger.addHandler(handler)
+
+RETRY_AFTER = int(os.getenv("POOL_RETRY_AFTER", "5"))
+
+
+class PoolSaturated(Exception):
+    """
+    Levantada quando a fila de admissão de um pool está cheia.
+    """
+    def __init__(self, pool: str, retry_after: int = RETRY_AFTER):
+        super().__init__(f"Pool '{pool}' saturado")
+        self.pool = pool
+        self.retry_after = retry_after
+
+
+class BoundedPool:
+    """
+    ThreadPoolExecutor com fila de admissão limitada: no máximo
+    `workers + queue_depth` tarefas em execução ou aguardando.
+    """
+    def __init__(self, name: str, workers: int, queue_depth: int, retry_after: int = RETRY_AFTER):
+        self.name = name
+        self.workers = workers
+        self.capacity = workers + queue_depth
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-pool")
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._in_flight = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def _release(self, _: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            logger.warning("[%s] fila cheia (%d), rejeitando", self.name, self.capacity)
+            raise PoolSaturated(self.name, self.retry_after)
+        try:
+            # leva o contexto (ex.: request-id) para a thread do pool
+            fut = self._executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._in_flight += 1
+        fut.add_done_callback(self._release)
+        return fut
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Executa `fn` no pool e bloqueia até o resultado (uso a partir de threads).
+        """
+        return self.submit(fn, *args, **kwargs).result()
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Executa `fn` no pool sem bloquear o event loop.
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def _drive(self, gen_fn: Callable[..., Iterator], args, kwargs,
+               emit: Callable[[bool, Any], None], stop: threading.Event) -> None:
+        # depois de `stop` (consumidor cancelado) nada mais é emitido: o
+        # gerador é fechado e o worker volta ao pool
+        gen = gen_fn(*args, **kwargs)
+        try:
+            for item in gen:
+                if stop.is_set():
+                    return
+                emit(False, item)
+        except BaseException as exc:
+            if not stop.is_set():
+                emit(True, exc)
+            return
+        finally:
+            gen.close()
+        if not stop.is_set():
+            emit(True, None)
+
+    def iterate(self, gen_fn: Callable[..., Iterator], *args, **kwargs) -> Iterator:
+        """
+        Consome o gerador `gen_fn` dentro do pool, ocupando um worker durante
+        toda a iteração, e repassa os itens para a thread chamadora.
+        """
+        items: queue.Queue = queue.Queue()
+        stop = threading.Event()
+        self.submit(self._drive, gen_fn, args, kwargs,
+                    lambda done, item: items.put((done, item)), stop)
+        try:
+            while True:
+                done, item = items.get()
+                if done:
+                    if item is not None:
+                        raise item
+                    return
+                yield item
+        finally:
+            stop.set()
+
+    async def stream(self, gen_fn: Callable[..., Iterator], *args, **kwargs) -> AsyncIterator:
+        """
+        Equivalente assíncrono de `iterate` para uso direto no event loop.
+        """
+        loop = asyncio.get_running_loop()
+        items: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        self.submit(self._drive, gen_fn, args, kwargs,
+                    lambda done, item: loop.call_soon_threadsafe(items.put_nowait, (done, item)), stop)
+        try:
+            while True:
+                done, item = await items.get()
+                if done:
+                    if item is not None:
+                        raise item
+                    return
+                yield item
+        finally:
+            stop.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "in_flight": self._in_flight,
+                "rejected": self._rejected,
+            }
+
+
+# I/O (backend, regex, sessão) e LLM ficam em pools separados para que a
+# geração lenta não segure as respostas baratas.
+io_pool = BoundedPool(
+    "io",
+    workers=int(os.getenv("IO_WORKERS", "16")),
+    queue_depth=int(os.getenv("IO_QUEUE_DEPTH", "64")),
+)
+llm_pool = BoundedPool(
+    "llm",
+    workers=int(os.getenv("LLM_WORKERS", "1")),
+    queue_depth=int(os.getenv("LLM_QUEUE_DEPTH", "4")),
+)
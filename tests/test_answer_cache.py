@@ -0,0 +1,29 @@
+from src.services import answer_cache as answer_cache_module
+from src.services.answer_cache import AnswerCache
+
+REPLY = "Para acessar o inventário, navegue até '/dashboard/codigos/inventory'."
+
+def test_normalized_question_hits_and_invalid_replies_are_skipped():
+    cache = AnswerCache(maxsize=4)
+    cache.put("Como acessar o inventário?", REPLY)
+    cache.put("Como ver o tempo?", "Não sei.")
+
+    assert cache.get("como acessar inventario") == REPLY
+    assert cache.get("Como ver o tempo?") is None
+
+def test_similarity_lookup_and_lru_eviction():
+    cache = AnswerCache(maxsize=2, similarity=True, threshold=0.8)
+    cache.put("Como acessar o inventário?", REPLY)
+    assert cache.get("Como acesso o inventario??") == REPLY
+    assert cache.get("Onde vejo o mapa de rastreamento?") is None
+
+    cache.put("Onde vejo o mapa?", "Use '/dashboard/rastreamento'.")
+    cache.put("Como gerar lote?", "Acesse '/dashboard/codigos/bulk-generate'.")
+    assert cache.get("Como acessar o inventário?") is None
+    assert cache.stats()["size"] == 2
+
+def test_flushed_when_context_changes(monkeypatch):
+    cache = AnswerCache()
+    cache.put("Como acessar o inventário?", REPLY)
+    monkeypatch.setattr(answer_cache_module, "context_fingerprint", lambda: "outro")
+    assert cache.get("Como acessar o inventário?") is None
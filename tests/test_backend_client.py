@@ -0,0 +1,26 @@
+from concurrent.futures import wait
+
+from benchmarks.fakes import StubBackend
+from src.services.backend_client import BackendClient, MAX_KEEPALIVE
+
+
+def test_sequential_calls_reuse_one_connection():
+    with StubBackend(latency_ms=1) as stub:
+        client = BackendClient(base_url=stub.url)
+        for _ in range(10):
+            assert client.get_json("/orchestration/inventory-quantity", {"resourceName": "porca"}) == {"amount": 35}
+        client.close()
+    assert stub.requests == 10
+    assert stub.connections == 1
+
+def test_fan_out_is_bounded_by_the_keepalive_pool():
+    with StubBackend(latency_ms=20) as stub:
+        client = BackendClient(base_url=stub.url)
+        for _ in range(3):
+            futures = [client.submit(client.get_json, "/orchestration/inventory-codes") for _ in range(MAX_KEEPALIVE)]
+            wait(futures)
+            assert all(f.exception() is None for f in futures)
+        client.close()
+    assert stub.requests == 3 * MAX_KEEPALIVE
+    # as rodadas seguintes reaproveitam as conexões da primeira
+    assert stub.connections <= MAX_KEEPALIVE
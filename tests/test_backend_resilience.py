@@ -0,0 +1,75 @@
+import time
+
+import httpx
+import pytest
+
+from benchmarks.fakes import StubBackend
+from src.services import ml_service
+from src.services.backend_client import BackendClient
+from src.utils.circuit_breaker import CircuitOpen
+from src.utils.deadline import DeadlineExceeded, budget
+from src.utils.metrics import BACKEND_HEDGES
+
+PATH = "/orchestration/inventory-quantity"
+
+
+@pytest.fixture
+def stub():
+    with StubBackend(latency_ms=5) as stub:
+        yield stub
+
+
+def test_deadline_caps_chained_calls(stub):
+    stub.latency = 0.3
+    client = BackendClient(base_url=stub.url)
+    start = time.perf_counter()
+    with budget(0.5):
+        client.get_json(PATH)
+        with pytest.raises(httpx.TimeoutException):
+            client.get_json(PATH)
+        with pytest.raises(DeadlineExceeded):
+            client.get_json(PATH)
+    assert time.perf_counter() - start < 0.7
+    # o timeout veio do prazo da requisição, não de um endpoint doente
+    assert client.breaker(PATH).state == "closed"
+
+def test_breaker_opens_fails_fast_and_recovers(stub):
+    client = BackendClient(base_url=stub.url)
+    breaker = client.breaker(PATH)
+    breaker.reset_after = 0.1
+    stub.status = 503
+    for _ in range(breaker.threshold):
+        with pytest.raises(httpx.HTTPStatusError):
+            client.get_json(PATH)
+    served = stub.requests
+    with pytest.raises(CircuitOpen):
+        client.get_json(PATH)
+    assert stub.requests == served
+
+    stub.status = 200
+    time.sleep(0.15)
+    assert client.get_json(PATH) == {"amount": 0}
+    assert breaker.state == "closed"
+
+def test_hedge_beats_slow_request(stub):
+    client = BackendClient(base_url=stub.url)
+    client.hedge = True
+    for _ in range(20):
+        client.get_json(PATH)
+    hedges = BACKEND_HEDGES.value(endpoint="/orchestration/inventory-quantity")
+    stub.slow, stub.slow_latency = 1, 1.0
+    start = time.perf_counter()
+    assert client.get_json(PATH) == {"amount": 0}
+    assert time.perf_counter() - start < 0.5
+    assert BACKEND_HEDGES.value(endpoint="/orchestration/inventory-quantity") == hedges + 1
+
+def test_open_circuit_gives_degraded_reply(stub, monkeypatch):
+    client = BackendClient(base_url=stub.url)
+    monkeypatch.setattr(ml_service, "backend", client)
+    stub.status = 503
+    for _ in range(client.breaker(PATH).threshold):
+        ml_service.MLService.get_inventory_quantity("Parafuso", "company-degraded")
+    served = stub.requests
+    reply = ml_service.MLService.fetch_inventory_for_product("Parafuso", "company-degraded")
+    assert "não foi possível consultar o estoque" in reply
+    assert stub.requests == served
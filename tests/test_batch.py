@@ -0,0 +1,56 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.services.batch_service import BatchService
+from src.services.chat_service import ChatService
+
+client = TestClient(app)
+
+def test_batch_dedupes_and_keeps_order(monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    def fake(user_message, session_id=None, user_id=None, company_id=None):
+        with lock:
+            calls.append(user_message)
+        return f"eco: {user_message}", session_id or f"s-{user_message}"
+
+    monkeypatch.setattr(ChatService, "generate_response", fake)
+    messages = ["Como ver o status?", "qual a previsão do tempo?", "Como ver o status?", "Como acessar lotes?"]
+    results = BatchService.run([{"message": m} for m in messages])
+
+    assert [r["response"] for r in results] == [f"eco: {m}" for m in messages]
+    assert sorted(calls) == sorted(set(messages))
+
+def test_batch_session_turns_run_in_order(monkeypatch):
+    seen = []
+    monkeypatch.setattr(
+        ChatService, "generate_response",
+        lambda user_message, session_id=None, **kw: (seen.append(user_message), (user_message, session_id))[1],
+    )
+    items = [{"message": f"status {i}", "session_id": "abc"} for i in range(5)]
+    BatchService.run(items)
+    assert seen == [f"status {i}" for i in range(5)]
+
+def test_batch_routes_cheap_paths_off_the_llm_executor(monkeypatch):
+    threads = {}
+    def fake(item):
+        threads[item["message"]] = threading.current_thread().name
+        return {"response": "ok"}
+
+    monkeypatch.setattr(BatchService, "_answer", staticmethod(fake))
+    BatchService.run([{"message": "qual a previsão do tempo?"}, {"message": "Como ver o status?"}])
+    assert threads["qual a previsão do tempo?"].startswith("batch-io")
+    assert threads["Como ver o status?"].startswith("batch-llm")
+
+def test_batch_endpoint():
+    response = client.post("/chat/batch", json={"messages": [
+        {"message": "qual a previsão do tempo?"},
+        {"message": "   "},
+    ]})
+    assert response.status_code == 200
+    first, second = response.json()["results"]
+    assert first["response"] == ChatService.FALLBACK
+    assert second == {"error": "Mensagem vazia.", "status": 400}
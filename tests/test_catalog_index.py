@@ -0,0 +1,29 @@
+from src.services import chat_service
+from src.services.chat_service import ChatService
+from src.services.ml_service import MLService
+from src.utils.catalog_index import CatalogIndex
+
+CATALOG = CatalogIndex(["Parafuso", "Parafuso M8", "Porca", "Arruela Lisa", "Chapa de Aço", "porca"])
+
+def test_fuzzy_and_multiword_matches():
+    assert len(CATALOG) == 5
+    assert CATALOG.match("quantos parafuzos eu tenho?") == "Parafuso"
+    assert CATALOG.match("tem parafuso m8?") == "Parafuso M8"
+    assert CATALOG.match("códigos da chapa de aco") == "Chapa de Aço"
+    assert CATALOG.match("e porcas, quantas?") == "Porca"
+
+def test_no_match_below_threshold():
+    assert CATALOG.match("quantos itens eu tenho no estoque?") == ""
+    assert CatalogIndex([]).match("parafuso") == ""
+
+def test_catalog_resolves_before_llm(monkeypatch):
+    def no_llm(_):
+        raise AssertionError("LLM não deveria ser chamado")
+
+    monkeypatch.setattr(chat_service, "extract_product_with_llm", no_llm)
+    monkeypatch.setattr(MLService, "get_catalog", staticmethod(lambda company_id: CATALOG))
+    monkeypatch.setattr(MLService, "fetch_inventory_for_product",
+                        staticmethod(lambda produto, company_id: f"{produto}: 3"))
+
+    reply, _ = ChatService.generate_response("e porcas, quantos?", company_id="c1")
+    assert reply == "Porca: 3"
@@ -0,0 +1,123 @@
+import json
+import time
+import asyncio
+import threading
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.api import chat as chat_api
+from src.models.chat_request import ChatRequest
+from src.services import chat_service
+from src.services.answer_cache import AnswerCache
+from src.services.chat_service import ChatService
+
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def llm_mode(monkeypatch):
+    monkeypatch.setattr(chat_service, "CHAT_MODE", "llm")
+    # cache de respostas vazio: cada teste precisa chegar ao modelo
+    monkeypatch.setattr(chat_service, "answer_cache", AnswerCache())
+
+class _FakeModel:
+    def __init__(self, tokens):
+        self.tokens = tokens
+
+    @contextmanager
+    def chat_session(self):
+        yield self
+
+    def generate(self, prompt, streaming=False, callback=None, **kwargs):
+        if not streaming:
+            return "".join(self.tokens)
+
+        def gen():
+            for tok in self.tokens:
+                if callback and not callback(0, tok):
+                    return
+                yield tok
+        return gen()
+
+def _events(text):
+    out = []
+    for block in text.strip().split("\n\n"):
+        event, data = block.split("\n", 1)
+        out.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return out
+
+def test_stream_emits_tokens_and_strips_markers(monkeypatch):
+    tokens = ["<|start", "_header_id|>", "Acesse ", "'/dashboard/", "status'.", " Pronto!", " Extra."]
+    monkeypatch.setattr(chat_service, "get_model", lambda: _FakeModel(tokens))
+
+    response = client.post("/chat/stream", json={"message": "Como ver o status?"})
+    assert response.status_code == 200
+    events = _events(response.text)
+
+    streamed = "".join(d["text"] for e, d in events if e == "token")
+    assert "<|" not in streamed
+    done = events[-1]
+    assert done[0] == "done"
+    assert done[1]["response"] == "Acesse '/dashboard/status'. Pronto!"
+    assert streamed == done[1]["response"]
+    assert done[1]["replaced"] is False
+    assert done[1]["session_id"]
+
+def test_stream_flushes_held_tail(monkeypatch):
+    tokens = ["Acesse ", "'/dashboard/status' ", "<"]
+    monkeypatch.setattr(chat_service, "get_model", lambda: _FakeModel(tokens))
+
+    response = client.post("/chat/stream", json={"message": "Como ver o status?"})
+    events = _events(response.text)
+    streamed = "".join(d["text"] for e, d in events if e == "token")
+    assert events[-1][1]["response"] == streamed == "Acesse '/dashboard/status' <"
+    assert events[-1][1]["replaced"] is False
+
+def test_stream_replaces_invalid_answer_with_fallback(monkeypatch):
+    monkeypatch.setattr(chat_service, "get_model", lambda: _FakeModel(["Não ", "sei."]))
+
+    response = client.post("/chat/stream", json={"message": "Como ver o status?"})
+    done = _events(response.text)[-1]
+    assert done[1]["response"] == ChatService.FALLBACK
+    assert done[1]["replaced"] is True
+
+def test_stream_fallback_path_without_llm():
+    response = client.post("/chat/stream", json={"message": "qual a previsão do tempo?"})
+    events = _events(response.text)
+    assert [e for e, _ in events] == ["token", "done"]
+    assert events[-1][1]["response"] == ChatService.FALLBACK
+
+def test_disconnect_stops_generation(monkeypatch):
+    stopped = threading.Event()
+
+    class _Endless(_FakeModel):
+        def generate(self, prompt, streaming=False, callback=None, **kwargs):
+            def gen():
+                try:
+                    while callback(0, "Acesse "):
+                        time.sleep(0.01)
+                        yield "Acesse "
+                finally:
+                    stopped.set()
+            return gen()
+
+    monkeypatch.setattr(chat_service, "get_model", lambda: _Endless([]))
+    # mantém o stream vivo: o fechamento tem de vir do endpoint, não do GC
+    streams = []
+    stream = chat_api.io_pool.stream
+    monkeypatch.setattr(chat_api.io_pool, "stream", lambda *a, **k: streams.append(stream(*a, **k)) or streams[-1])
+
+    async def disconnect():
+        response = await chat_api.chat_stream_endpoint(ChatRequest(message="Como ver o status?"), session_id=None)
+        await response.body_iterator.__anext__()
+        await response.body_iterator.aclose()
+        # antes de o loop terminar (que fecharia os geradores de qualquer forma)
+        for _ in range(200):
+            if stopped.is_set():
+                return True
+            await asyncio.sleep(0.01)
+        return False
+
+    assert asyncio.run(disconnect())
@@ -0,0 +1,27 @@
+import subprocess
+import sys
+import warnings
+
+import joblib
+import numpy as np
+
+from src.ml.compact_forest import CompactForest, MODEL_NPZ, MODEL_PKL
+
+def test_shipped_predictor_matches_sklearn():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        model = joblib.load(MODEL_PKL)
+        forest = CompactForest.load(MODEL_NPZ)
+        points = [(0, 0), (2, 0), (10, 2), (3, 4), (127, 127), (128, 0), (500, 3), (7, 10**6)]
+        expected = model.predict(np.array(points, dtype=float))
+    assert [forest.predict(c, e) for c, e in points] == list(expected)
+
+def test_runtime_load_does_not_import_sklearn():
+    code = (
+        "import sys\n"
+        "from src.services.ml_service import MLService\n"
+        "MLService.load_action_model(); MLService.predict_next_action(0, 3)\n"
+        "print('sklearn' in sys.modules)\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
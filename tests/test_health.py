@@ -0,0 +1,52 @@
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+import src.main
+from src.api import health
+from src.main import app
+from src.services import chat_service
+from src.services.warmup import Warmup
+
+def test_live_does_not_depend_on_model():
+    with TestClient(app) as client:
+        assert client.get("/health/live").json() == {"status": "ok"}
+
+def test_ready_after_background_warmup(monkeypatch):
+    gate = threading.Event()
+    state = Warmup()
+    monkeypatch.setattr(src.main, "warmup", state)
+    monkeypatch.setattr(health, "warmup", state)
+    monkeypatch.setattr(src.main, "_warmup_steps", lambda: [("llm", gate.wait)])
+
+    with TestClient(app) as client:
+        response = client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "warming"
+
+        gate.set()
+        for _ in range(100):
+            if state.ready:
+                break
+            time.sleep(0.01)
+        response = client.get("/health/ready")
+        assert response.status_code == 200
+        assert response.json()["time_to_ready"] > 0
+        assert "llm" in response.json()["stages"]
+
+def test_cheap_paths_served_while_model_loads(monkeypatch):
+    state = Warmup()
+    state.loading = True
+    monkeypatch.setattr(chat_service, "warmup", state)
+    monkeypatch.setattr(chat_service, "get_model", lambda: (_ for _ in ()).throw(AssertionError("LLM")))
+    client = TestClient(app)
+
+    fallback = client.post("/chat/", json={"message": "qual a previsão do tempo?"})
+    assert fallback.status_code == 200
+    assert fallback.json()["response"] == chat_service.ChatService.FALLBACK
+
+    # pergunta de domínio sem resposta confiante por recuperação: 503
+    pending = client.post("/chat/", json={"message": "me explique os lotes e o mapa"})
+    assert pending.status_code == 503
+    assert pending.headers["retry-after"]
@@ -0,0 +1,16 @@
+import pytest
+
+from src.services.intent_router import route
+
+@pytest.mark.parametrize("message, has_company, path, product", [
+    ("Quantos parafusos eu tenho?",       True,  "inventory", "parafuso"),
+    ("Quantos parafusos eu tenho?",       False, "llm",       "parafuso"),
+    ("listar códigos do parafuso",        True,  "codes",     "parafuso"),
+    ("Como acessar o inventário?",        True,  "llm",       None),
+    ("Onde vejo o mapa de rastreamento?", False, "llm",       None),
+    ("qual a previsão do tempo?",         True,  "fallback",  None),
+])
+def test_route_paths_and_slots(message, has_company, path, product):
+    intent = route(message)
+    assert intent.path(has_company) == path
+    assert intent.slots.get("product") == product
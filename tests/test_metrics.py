@@ -0,0 +1,61 @@
+import logging
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.utils.metrics import Histogram, Counter
+from src.utils.request_context import request_id
+from src.utils.worker_pool import io_pool
+
+client = TestClient(app)
+
+def test_histogram_renders_cumulative_buckets():
+    hist = Histogram("t_seconds", "teste", buckets=(0.1, 1))
+    for value in (0.05, 0.5, 5):
+        hist.observe(value, stage="x")
+    lines = hist.render()
+    assert 't_seconds_bucket{stage="x",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{stage="x",le="1"} 2' in lines
+    assert 't_seconds_bucket{stage="x",le="+Inf"} 3' in lines
+    assert 't_seconds_count{stage="x"} 3' in lines
+
+def test_counter_escapes_labels():
+    counter = Counter("t_total", "teste")
+    counter.inc(path='a"b')
+    assert counter.render()[-1] == 't_total{path="a\\"b"} 1'
+
+def test_request_id_header_and_stage_metrics():
+    response = client.post("/chat/", json={"message": "qual a previsão do tempo?"}, headers={"X-Request-ID": "abc123"})
+    assert response.headers["x-request-id"] == "abc123"
+    assert client.get("/system/sessions").headers["x-request-id"]
+
+    body = client.get("/metrics").text
+    assert 'chat_stage_seconds_count{stage="route"}' in body
+    assert 'chat_path_total{path="fallback"}' in body
+    assert 'chat_request_seconds_count{method="POST",route="/chat/",status="200"}' in body
+    assert "chat_cache_hit_ratio" in body
+
+def test_request_id_reaches_pool_threads_and_logs(caplog):
+    logger = logging.getLogger("test-request-id")
+    token = request_id.set("rid-1")
+    try:
+        assert io_pool.call(request_id.get) == "rid-1"
+        with caplog.at_level(logging.INFO, logger="test-request-id"):
+            io_pool.call(logger.info, "mensagem")
+    finally:
+        request_id.reset(token)
+    assert "[rid-1] mensagem" in caplog.text
+
+def test_invalid_request_id_is_replaced_and_logs_stay_intact(caplog):
+    response = client.post("/chat/", json={"message": "qual a previsão do tempo?"}, headers={"X-Request-ID": "%d%d%s"})
+    assert response.headers["x-request-id"] != "%d%d%s"
+
+    logger = logging.getLogger("test-request-id")
+    token = request_id.set("rid-2")
+    try:
+        with caplog.at_level(logging.INFO, logger="test-request-id"):
+            logger.info("%d documentos", 3)
+    finally:
+        request_id.reset(token)
+    assert caplog.records[-1].msg == "%d documentos"
+    assert "[rid-2] 3 documentos" in caplog.text
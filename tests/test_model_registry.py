@@ -0,0 +1,23 @@
+from src.utils import model_registry
+
+class _FakeGPT4All:
+    loads = 0
+
+    def __init__(self, model_file, **params):
+        _FakeGPT4All.loads += 1
+        self.model_file = model_file
+
+def test_same_file_and_params_share_one_instance(monkeypatch):
+    monkeypatch.setattr(model_registry, "GPT4All", _FakeGPT4All)
+    monkeypatch.setattr(model_registry, "_entries", {})
+    monkeypatch.setattr(model_registry, "_by_model", {})
+
+    main = model_registry.get("/tmp/main.gguf")
+    again = model_registry.get("/tmp/main.gguf")
+    small = model_registry.get("/tmp/small.gguf")
+
+    assert main is again
+    assert small is not main
+    assert _FakeGPT4All.loads == 2
+    assert model_registry.generation_lock(main) is model_registry.generation_lock(again)
+    assert {s["model_file"] for s in model_registry.stats()} == {"/tmp/main.gguf", "/tmp/small.gguf"}
@@ -0,0 +1,36 @@
+import json
+
+import download_model
+from benchmarks.fakes import FakeGPT4All
+from src.utils.llm import log_selection_report
+
+
+def test_fastest_variant_that_passes_wins():
+    results = [
+        {"file": "m.Q8_0.gguf", "mean_s": 3.0, "accuracy": 1.0},
+        {"file": "m.Q4_K_M.gguf", "mean_s": 1.5, "accuracy": 0.86},
+        {"file": "m.Q3_K_L.gguf", "mean_s": 1.0, "accuracy": 0.57},
+        {"file": "m.Q2_K.gguf", "error": "exit 1"},
+    ]
+    assert download_model.choose(results, min_accuracy=0.85)["file"] == "m.Q4_K_M.gguf"
+    assert [r.get("passed") for r in results] == [True, True, False, None]
+    assert download_model.choose(results, min_accuracy=1.1)["file"] == "m.Q8_0.gguf"
+
+def test_bench_measures_speed_and_route_accuracy(tmp_path):
+    gguf = tmp_path / "m.Q4_K_M.gguf"
+    gguf.write_bytes(b"\0" * 16)
+    # a resposta fixa do dublê só cita /dashboard/status
+    result = download_model.bench(str(gguf), lambda _: FakeGPT4All(tokens_per_sec=2000, prefill_ms=0.01))
+    assert result["accuracy"] == round(1 / len(download_model._questions()), 3)
+    assert result["decode_tps"] > 0 and result["prefill_tps"] > 0 and result["peak_rss_mb"] > 0
+
+def test_report_is_logged(tmp_path):
+    path = tmp_path / "selection.json"
+    report = {"selected": "m.Q4_K_M.gguf", "mode": "bench", "candidates": [
+        {"file": "m.Q4_K_M.gguf", "load_s": 1.2, "prefill_tps": 80.0, "decode_tps": 12.5,
+         "mean_s": 1.5, "peak_rss_mb": 2100.0, "accuracy": 0.86, "passed": True},
+        {"file": "m.Q2_K.gguf", "error": "exit 1"},
+    ]}
+    path.write_text(json.dumps(report))
+    assert log_selection_report(str(path)) == report
+    assert log_selection_report(str(tmp_path / "ausente.json")) is None
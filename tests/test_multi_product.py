@@ -0,0 +1,66 @@
+import pytest
+
+from benchmarks.fakes import StubBackend
+from src.services import ml_service
+from src.services.backend_client import BackendClient
+from src.services.chat_service import ChatService
+from src.services.ml_service import MLService
+from src.utils.catalog_index import CatalogIndex
+from src.utils.product_extractor import match_products
+
+NAMES = ["parafuso", "porca", "arruela"]
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    with StubBackend(latency_ms=5) as stub:
+        monkeypatch.setattr(ml_service, "backend", BackendClient(base_url=stub.url))
+        monkeypatch.setattr(MLService, "_unsupported", {})
+        MLService.invalidate_cache()
+        yield stub
+    MLService.invalidate_cache()
+
+
+def test_extracts_every_mention():
+    assert match_products("quantos parafusos, porcas e arruelas eu tenho?") == NAMES
+    assert match_products("listar codigos do parafuso e da porca") == ["parafuso", "porca"]
+    assert match_products("quantos parafusos e quantas porcas eu tenho?") == ["parafuso", "porca"]
+    assert match_products("quantos parafusos, e onde vejo o mapa?") == ["parafuso"]
+    assert match_products("quantos parafusos e o que mais tenho?") == ["parafuso"]
+    catalog = CatalogIndex(["Parafuso", "Parafuso M8", "Porca", "Arruela Lisa"])
+    assert catalog.match_all("e parafusos m8, porcas e arruelas lisas?") == ["Parafuso M8", "Porca", "Arruela Lisa"]
+
+def test_bulk_endpoint_is_one_round_trip(stub):
+    assert MLService.get_inventory_quantities(NAMES, "c1") == {n: len(n) * 7 for n in NAMES}
+    assert stub.requests == 1
+    # o lote alimenta o cache das consultas unitárias
+    assert MLService.get_inventory_quantity("porca", "c1") == 35
+    assert stub.requests == 1
+
+def test_falls_back_to_fan_out_without_bulk_endpoint(stub):
+    stub.bulk = False
+    misses = MLService.codes_cache.stats()["misses"]
+    codes = MLService.fetch_codes_for_products(NAMES, "c1")
+    assert codes["porca"][0] == "POR-0000"
+    assert stub.requests == 1 + len(NAMES)
+    assert MLService.codes_cache.stats()["misses"] - misses == len(NAMES)
+    # o lote fica desligado: as próximas consultas vão direto ao fan-out
+    MLService.invalidate_cache()
+    MLService.fetch_codes_for_products(NAMES, "c1")
+    assert stub.requests == 1 + 2 * len(NAMES)
+
+def test_compound_question_gets_one_table(stub):
+    reply, _ = ChatService.generate_response("quantos parafusos, porcas e arruelas eu tenho?", company_id="c1")
+    assert reply.splitlines() == [
+        "| Produto | Quantidade |",
+        "|---|---|",
+        "| parafuso | 56 |",
+        "| porca | 35 |",
+        "| arruela | 49 |",
+    ]
+
+def test_missing_catalog_endpoint_is_not_retried(stub, monkeypatch):
+    monkeypatch.setattr(ml_service, "CATALOG_PATH", "/orchestration/catalogo")
+    assert MLService.get_catalog("c1") is None
+    assert MLService.get_catalog("c1") is None
+    assert stub.requests == 1
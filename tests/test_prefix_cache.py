@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+from src.utils.prefix_cache import PrefixCache
+
+class _FakeLLModel:
+    """Contexto de prompt mínimo: cada caractere vira um token."""
+    def __init__(self):
+        self.context = None
+        self.prefilled = 0
+
+    def prompt_model(self, prompt, template, callback, reset_context=False, n_predict=0, **kwargs):
+        if self.context is None:
+            self.context = SimpleNamespace(n_past=0, tokens=[], tokens_size=0)
+        ctx = self.context
+        if reset_context:
+            ctx.n_past = 0
+        ctx.tokens = ctx.tokens[:ctx.n_past] + [ord(c) for c in prompt]
+        ctx.n_past = ctx.tokens_size = len(ctx.tokens)
+        self.prefilled += len(prompt)
+        for c in "ok"[:n_predict]:
+            callback(0, c)
+
+def test_prefix_is_evaluated_once_and_rewound():
+    model = SimpleNamespace(model=_FakeLLModel())
+    cache = PrefixCache()
+
+    assert cache.generate(model, "SYSTEM", "q1", max_tokens=2) == "ok"
+    assert cache.generate(model, "SYSTEM", "q2", max_tokens=2) == "ok"
+    assert cache.stats() == {"hits": 1, "misses": 1}
+    assert model.model.prefilled == len("SYSTEM") + 2 * len("q1")
+
+def test_prefix_reevaluated_after_context_reuse_or_change():
+    model = SimpleNamespace(model=_FakeLLModel())
+    cache = PrefixCache()
+
+    cache.generate(model, "SYSTEM", "q1", max_tokens=2)
+    # outra chamada (ex.: extrator) reinicia o contexto
+    model.model.prompt_model("extrator", "%1", lambda *_: True, reset_context=True)
+    cache.generate(model, "SYSTEM", "q2", max_tokens=2)
+    cache.generate(model, "SYSTEM v2", "q3", max_tokens=2)
+    assert cache.stats() == {"hits": 0, "misses": 3}
@@ -0,0 +1,31 @@
+from src.services.prompt_builder import PromptBuilder, TokenCounter
+
+
+def test_compact_prompt_keeps_relevant_entries_within_budget():
+    builder = PromptBuilder(budget=300)
+    prompt = builder.build("como gero qr codes em lote?")
+    assert "/dashboard/codigos/bulk-generate" in prompt
+    assert "/dashboard/rastreamento" not in prompt
+    assert builder.counter.count(prompt) <= 300 < builder.counter.count(builder.full())
+
+def test_same_selection_reuses_assembled_prompt():
+    builder = PromptBuilder()
+    first = builder.build("como gerar lote de QR Codes?")
+    assert builder.build("como gerar lote de QR Codes?") is first
+
+def test_unrelated_question_falls_back_to_full_prompt():
+    assert PromptBuilder().build("qual a previsão do tempo amanhã?") is None
+
+def test_counter_calibrates_with_real_token_counts():
+    counter = TokenCounter(chars_per_token=4)
+    counter.observe("x" * 300, 100)
+    assert counter.count("x" * 30) == 11
+
+def test_full_prompt_is_the_warmed_system_prefix():
+    from src.services.chat_service import ChatService, _chatml_system
+    from src.services.prompt_builder import prompt_builder
+    from src.utils.context_loader import load_system_context
+
+    full = prompt_builder.full()
+    assert full.startswith(load_system_context())
+    assert ChatService.system_prefix() == _chatml_system(full)
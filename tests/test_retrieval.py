@@ -0,0 +1,13 @@
+from src.services.retrieval import Retriever, _example_pairs
+
+
+def test_examples_map_to_their_routes():
+    retriever = Retriever()
+    for question, answer in _example_pairs():
+        hit = retriever.search(question)
+        assert hit.confident
+        assert any(route in hit.reply for route in answer.split("'") if route.startswith("/dashboard"))
+
+def test_off_topic_question_is_not_confident():
+    hit = Retriever().search("qual a previsão do tempo amanhã?")
+    assert not hit.confident
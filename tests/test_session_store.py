@@ -0,0 +1,41 @@
+import time
+
+from src.services.session_store import InMemorySessionStore, SQLiteSessionStore
+
+def test_history_is_capped_ring_buffer():
+    store = InMemorySessionStore(max_turns=2)
+    sess = store.get("s1")
+    for i in range(5):
+        sess.add_turn(f"q{i}", f"a{i}")
+    store.save(sess)
+    assert list(store.get("s1").lines()) == ["Usuário: q3", "Assistente: a3", "Usuário: q4", "Assistente: a4"]
+
+def test_lru_and_ttl_eviction():
+    store = InMemorySessionStore(ttl=60, max_sessions=2)
+    store.get("a").last_product = "porca"
+    store.get("b")
+    store.get("a")
+    store.get("c")
+    assert store.stats()["sessions"] == 2
+    assert store.stats()["evictions"] == 1
+    assert store.get("a").last_product == "porca"  # "b" era o menos recente
+
+    store = InMemorySessionStore(ttl=0.01)
+    store.get("old").last_product = "porca"
+    time.sleep(0.02)
+    assert store.get("old").last_product is None
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    worker_a = SQLiteSessionStore(path=path)
+    worker_b = SQLiteSessionStore(path=path)
+
+    sess = worker_a.get("s1")
+    sess.add_turn("quantos parafusos?", "10")
+    sess.last_product = "parafuso"
+    worker_a.save(sess)
+
+    other = worker_b.get("s1")
+    assert other.last_product == "parafuso"
+    assert other.user_turns() == 1
+    assert worker_b.stats()["sessions"] == 1
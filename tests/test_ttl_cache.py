@@ -0,0 +1,53 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.services.ml_service import MLService
+from src.utils.ttl_cache import TTLCache
+
+client = TestClient(app)
+
+def test_concurrent_lookups_share_one_load():
+    cache = TTLCache("t", ttl=60)
+    calls, gate = [], threading.Event()
+
+    def loader():
+        calls.append(1)
+        gate.wait()
+        return 42
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(cache.get_or_load, "k", loader) for _ in range(8)]
+        time.sleep(0.05)
+        gate.set()
+        assert [f.result() for f in futures] == [42] * 8
+    assert len(calls) == 1
+    assert cache.get_or_load("k", loader) == 42
+    assert cache.stats()["hits"] == 1
+
+def test_expiry_eviction_and_errors_not_cached():
+    cache = TTLCache("t", ttl=0.01, maxsize=2)
+    cache.get_or_load("a", lambda: 1)
+    time.sleep(0.02)
+    assert cache.get_or_load("a", lambda: 2) == 2
+
+    cache.get_or_load("b", lambda: 3)
+    cache.get_or_load("c", lambda: 4)
+    assert cache.stats()["evictions"] == 1
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("d", lambda: (_ for _ in ()).throw(RuntimeError("x")))
+    assert cache.get_or_load("d", lambda: 5) == 5
+
+def test_invalidate_endpoint_drops_company_entries():
+    MLService.inventory_cache.get_or_load(("c1", "porca"), lambda: {"amount": 1})
+    MLService.inventory_cache.get_or_load(("c2", "porca"), lambda: {"amount": 2})
+
+    response = client.post("/cache/invalidate", json={"company_id": "c1"})
+    assert response.status_code == 200
+    assert response.json()["removed"]["inventory"] == 1
+    assert MLService.inventory_cache.get_or_load(("c2", "porca"), lambda: {"amount": 0}) == {"amount": 2}
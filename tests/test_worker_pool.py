@@ -0,0 +1,92 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+import subprocess
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.services.chat_service import ChatService
+from src.utils.worker_pool import BoundedPool, PoolSaturated, llm_pool
+
+client = TestClient(app)
+
+def test_pool_rejects_when_queue_full():
+    pool = BoundedPool("test", workers=1, queue_depth=1, retry_after=7)
+    gate = threading.Event()
+    running = [pool.submit(gate.wait), pool.submit(gate.wait)]
+    with pytest.raises(PoolSaturated) as exc:
+        pool.submit(gate.wait)
+    assert exc.value.retry_after == 7
+    gate.set()
+    for fut in running:
+        fut.result()
+    assert pool.call(lambda: 42) == 42
+    assert pool.stats()["rejected"] == 1
+
+def test_chat_endpoint_returns_503_when_saturated(monkeypatch):
+    def saturated(*args, **kwargs):
+        raise PoolSaturated("llm", retry_after=3)
+
+    monkeypatch.setattr(ChatService, "generate_response", saturated)
+    response = client.post("/chat", json={"message": "Como acessar o inventário?"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+
+def test_fallback_not_blocked_by_busy_llm_pool():
+    gate = threading.Event()
+    busy = [llm_pool.submit(gate.wait) for _ in range(llm_pool.capacity)]
+    try:
+        response = client.post("/chat", json={"message": "qual a previsão do tempo?"})
+    finally:
+        gate.set()
+        for fut in busy:
+            fut.result()
+    assert response.status_code == 200
+    assert response.json()["response"] == ChatService.FALLBACK
+
+def test_dotenv_is_loaded_before_pool_settings(tmp_path):
+    env_file = tmp_path / ".env"
+    env_file.write_text("LLM_WORKERS=2\nLLM_QUEUE_DEPTH=1\nCHAT_MODE=retrieval\n")
+    # o .env do teste no lugar do encontrado a partir de src/main.py
+    script = (
+        "import sys, dotenv\n"
+        "load = dotenv.load_dotenv\n"
+        "dotenv.load_dotenv = lambda *a, **k: load(sys.argv[1])\n"
+        "import src.main\n"
+        "from src.utils.worker_pool import llm_pool\n"
+        "from src.services import retrieval\n"
+        "print(llm_pool.capacity, retrieval.CHAT_MODE)\n"
+    )
+    env = {k: v for k, v in os.environ.items() if k not in ("LLM_WORKERS", "LLM_QUEUE_DEPTH", "CHAT_MODE")}
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", script, str(env_file)], cwd=root, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    assert out.strip().splitlines()[-1] == "3 retrieval"
+
+def test_cancelled_stream_closes_generator_and_frees_slot():
+    pool = BoundedPool("test", workers=1, queue_depth=0)
+    closed = threading.Event()
+
+    def endless():
+        try:
+            while True:
+                time.sleep(0.01)
+                yield 1
+        finally:
+            closed.set()
+
+    async def consume_one():
+        events = pool.stream(endless)
+        await events.__anext__()
+        await events.aclose()
+
+    asyncio.run(consume_one())
+    assert closed.wait(2)
+    deadline = time.monotonic() + 2
+    while pool.stats()["in_flight"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert pool.stats()["in_flight"] == 0